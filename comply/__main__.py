@@ -5,9 +5,21 @@
 Compliant Style Guide
 
 Usage:
-  comply <input>... [--reporter=<name>] [--check=<rule>]... [--except=<rule>]...
-                    [--limit=<amount>] [--strict] [--only-severe] [--verbose]
-                    [--profile]
+  comply merge <results>... [--reporter=<name>] [--limit=<amount>] [--strict] [--verbose]
+  comply serve-work (<input>... | --compile-commands=<path> [<input>...] | --files-from=<path>)
+                    [--address=<address>] [--reporter=<name>] [--check=<rule>]...
+                    [--except=<rule>]... [--exclude=<pattern>]... [--git-files]
+                    [--skip-generated] [--max-file-size=<bytes>] [--cache]
+                    [--limit=<amount>] [--strict] [--only-severe] [--verbose] [--profile]
+  comply worker <address>
+  comply (<input>... | --compile-commands=<path> [<input>...] | --files-from=<path>
+          | --stdin [--stdin-filename=<name>])
+                    [--reporter=<name>] [--check=<rule>]... [--except=<rule>]...
+                    [--exclude=<pattern>]... [--git-files] [--skip-generated]
+                    [--max-file-size=<bytes>] [--cache] [--limit=<amount>] [--strict]
+                    [--only-severe] [--verbose] [--profile] [--jobs=<amount>]
+                    [--backend=<name>] [--longest-first] [--file-timeout=<seconds>]
+                    [--shard=<i/n>] [--save-results=<path>] [--fail-fast]
 
   comply -h | --help
   comply --version
@@ -15,6 +27,40 @@ Usage:
 Options:
   -r --reporter=<name>    Specify type of reported output [default: human]
   -i --limit=<amount>     Limit the amount of reported violations
+  -X --exclude=<pattern>  Don't check files or directories matching a pattern
+                          (patterns are also read from a .complyignore file, if any)
+  -g --git-files          Only check files tracked by git, as listed by its index
+                          (falls back to finding files on disk outside of a repository)
+  -c --compile-commands=<path>
+                          Check the translation units listed in a compilation database
+                          (any inputs are then only searched for headers)
+  -f --files-from=<path>  Check each path listed in a file, or in standard input if -
+                          (paths are delimited by linebreaks or NUL characters)
+  -G --skip-generated     Leave out files that appear to be generated, rather than checking them
+                          (e.g. files with a "DO NOT EDIT" banner, or with very long lines)
+  -m --max-file-size=<bytes>
+                          Leave out files larger than a number of bytes, as if generated
+  -C --cache              Reuse the results of files checked by earlier runs, if unchanged
+                          (results are kept in a .comply-cache file)
+  --stdin                 Check text read from standard input, rather than any files
+  --stdin-filename=<name>
+                          Specify the filename of the text read from standard input
+                          [default: stdin.c]
+  -j --jobs=<amount>      Check files in parallel using several processes
+                          (defaults to the number of available CPUs)
+  -b --backend=<name>     Specify whether parallel checks run on processes or threads
+                          (defaults to threads only on free-threaded builds)
+  -l --longest-first      Check the most costly files first when checking in parallel
+                          (costs are estimated from sizes and timings of earlier profiling)
+  -t --file-timeout=<seconds>
+                          Stop checking any file that takes longer than a number of seconds
+                          (files are then always checked on separate processes)
+  -S --shard=<i/n>        Only check files belonging to shard i of n (from 1 to n)
+  -o --save-results=<path>
+                          Save results to a file that can be merged with other shards
+  -x --fail-fast          Check severe rules first and stop at the first severe violation
+  -a --address=<address>  Specify the address that workers connect to when serving work
+                          [default: 127.0.0.1:8415]
   -s --strict             Increase severity for less severe rules
   -P --profile            Show profiling/benchmark results
   -v --verbose            Show diagnostic messages
@@ -31,6 +77,8 @@ import os
 import re
 import sys
 import datetime
+import threading
+import collections
 
 from docopt import docopt
 
@@ -38,18 +86,30 @@ from pkg_resources import parse_version
 
 from comply import (
     VERSION_PATTERN,
-    EXIT_CODE_SUCCESS, EXIT_CODE_SUCCESS_WITH_SEVERE_VIOLATIONS,
+    EXIT_CODE_SUCCESS, EXIT_CODE_FAILURE, EXIT_CODE_SUCCESS_WITH_SEVERE_VIOLATIONS,
     exit_if_not_compatible
 )
 
 from comply.reporting import Reporter, OneLineReporter, HumanReporter, XcodeReporter
 from comply.printing import printdiag, diagnostics, supports_unicode, is_windows_environment, Colors
-from comply.checking import find_checkable_files, check
+from comply.discovering import (
+    IGNORE_FILENAME, ARCHIVE_SEPARATOR,
+    find_checkable_files, find_tracked_files, find_listed_paths, find_archived_files,
+    load_excluded_patterns, load_compilation_database, compiled_files_finder, is_archive
+)
+from comply.scheduling import (
+    PROCESS_BACKEND, THREAD_BACKEND, TIMINGS_FILENAME,
+    available_cpu_count, default_backend, check_in_stages, load_timings, save_timings
+)
+from comply.caching import CACHE_FILENAME, ResultCache
+from comply.merging import shard_of, save_results, load_results, check_merged
+from comply.distributing import Coordinator, Abandoned, parse_address, run_worker
 from comply.version import __version__
 
 import comply.printing
 
 from comply.rules.report import CheckResult
+from comply.checking import load, load_from, check_loaded, is_generated
 from comply.rules.rule import Rule, RuleViolation
 from comply.rules import *
 
@@ -181,8 +241,318 @@ def make_reporter(reporting_mode: str) -> Reporter:
     return Reporter()
 
 
-def make_report(inputs: list, rules: list, reporter: Reporter) -> CheckResult:
-    """ Run checks and print a report. """
+def make_backend(backend: str) -> str:
+    """ Return a backend for running checks in parallel. """
+
+    if backend is None:
+        return default_backend()
+
+    if backend in [PROCESS_BACKEND, THREAD_BACKEND]:
+        return backend
+
+    printdiag('Backend \'{0}\' not available.'.format(backend),
+              as_error=True)
+
+    return default_backend()
+
+
+def make_shard(shard: str) -> (int, int):
+    """ Return a shard number and the total number of shards. """
+
+    match = re.match(r'^(\d+)/(\d+)$', shard)
+
+    if match is not None:
+        shard_number, num_shards = int(match.group(1)), int(match.group(2))
+
+        if 1 <= shard_number <= num_shards:
+            return shard_number, num_shards
+
+    printdiag('Shard \'{0}\' not valid; must be i/n with i from 1 to n.'.format(shard),
+              as_error=True)
+
+    sys.exit(EXIT_CODE_FAILURE)
+
+
+def make_report(inputs: list, rules: list, reporter: Reporter, jobs: int=1,
+                backend: str=PROCESS_BACKEND, timings: dict=None,
+                longest_first: bool=False, timeout: float=None, shard: tuple=None,
+                saved: list=None, coordinator: Coordinator=None,
+                fail_fast: bool=False, excluded: list=None,
+                find_files=find_checkable_files, in_order: bool=False,
+                skip_generated: bool=False, max_file_size: int=None,
+                cache: ResultCache=None) -> CheckResult:
+    """ Run checks and print a report.
+
+        See check_in_stages() for how files are checked, and in which order results are reported.
+
+        shard: the shard number and number of shards; only files in that shard are checked
+        saved: a list that the result of each file is appended to, for merging shards later
+        excluded: patterns of files and directories to leave out; see find_checkable_files()
+        find_files: finds the checkable files of an input, given the input and excluded
+        in_order: whether inputs are checked in the order provided, rather than sorted
+        skip_generated: whether to leave out files that appear generated; see is_generated()
+        max_file_size: the size, in bytes, above which files are left out, if set
+    """
+
+    # the index of each discovered path that belongs to the shard, in order of discovery
+    indices = collections.deque()
+
+    # the data of each file found in an archive, waiting to be read
+    archived = {}
+
+    # guards archived; files are discovered and read on separate threads
+    archiving = threading.Lock()
+
+    def load_discovered(path: str) -> (int, str, str, bytes):
+        """ Return a code, text, encoding and data for a discovered file, as if read by load().
+        """
+
+        with archiving:
+            pending = archived.get(path)
+
+            data = pending.popleft() if pending else None
+
+            if pending is not None and len(pending) == 0:
+                # every file stored under this path has been read; don't keep it around
+                del archived[path]
+
+        loaded = load_from(path, data) if data is not None else load(path)
+
+        checked, text, encoding, data = loaded
+
+        if skip_generated and checked == CheckResult.FILE_CHECKED and is_generated(text):
+            # left out files are only summarized; they do not count toward the total
+            reporter.count_left_out_file()
+
+            return CheckResult.FILE_GENERATED, None, None, None
+
+        return loaded
+
+    def found_files(path: str):
+        """ Yield the path and data, if already read, of each checkable file found in an input.
+        """
+
+        if is_archive(path) and not os.path.isdir(path):
+            yield from find_archived_files(path, excluded)
+        else:
+            for checkable_path in find_files(path, excluded):
+                yield checkable_path, None
+
+    def is_too_large(path: str, data: bytes) -> bool:
+        """ Determine whether a file is larger than the max file size, if set. """
+
+        if max_file_size is None:
+            return False
+
+        try:
+            size = len(data) if data is not None else os.path.getsize(path)
+        except OSError:
+            # the file could not be looked up; let load() decide why
+            return False
+
+        return size > max_file_size
+
+    def is_in_shard(path: str) -> bool:
+        """ Determine whether a path belongs to the shard being checked. """
+
+        if shard is None:
+            return True
+
+        shard_number, num_shards = shard
+
+        return shard_of(path, num_shards) == shard_number
+
+    def discover():
+        """ Yield each checkable file found in the inputs.
+
+            Inputs that could not be checked are yielded along with a code indicating why.
+        """
+
+        index = 0
+
+        # sort paths for consistent output per identical run; directories are sorted as if
+        # each of their files were listed in place
+        ordered_inputs = (inputs if in_order else
+                          sorted(inputs, key=lambda p: p + '/' if os.path.isdir(p) else p))
+
+        for path in ordered_inputs:
+            has_found_files = False
+
+            unread = None
+
+            try:
+                # files are yielded as soon as they are found; the total grows along the way
+                for checkable_path, data in found_files(path):
+                    has_found_files = True
+
+                    # files are sharded by their path relative to the input they were found in
+                    if checkable_path == path:
+                        relative_path = path
+                    elif data is not None:
+                        relative_path = checkable_path[len(path + ARCHIVE_SEPARATOR):]
+                    else:
+                        relative_path = os.path.relpath(checkable_path, path)
+
+                    if is_in_shard(relative_path):
+                        indices.append(index)
+
+                        if is_too_large(checkable_path, data):
+                            # left out files are only summarized; they do not count toward
+                            # the total
+                            yield checkable_path, CheckResult.FILE_GENERATED
+                        else:
+                            reporter.count_discovered_file()
+
+                            if data is not None:
+                                with archiving:
+                                    archived.setdefault(checkable_path,
+                                                        collections.deque()).append(data)
+
+                            yield checkable_path, None
+
+                    index += 1
+            except FileNotFoundError:
+                unread = CheckResult.FILE_NOT_FOUND
+            except (OSError, ValueError):
+                unread = CheckResult.FILE_NOT_READ
+
+            if unread is not None:
+                # the archive could not be read, or could only be read in part
+                if is_in_shard(path):
+                    indices.append(index)
+
+                    yield path, unread
+
+                index += 1
+
+                continue
+
+            if has_found_files:
+                # one or more valid files were found
+                continue
+
+            if is_in_shard(path):
+                indices.append(index)
+
+                if os.path.isdir(path) or is_archive(path):
+                    # the path was a directory or archive, but no valid files were found inside
+                    yield path, CheckResult.NO_FILES_FOUND
+                else:
+                    # the path was a single file, but not considered valid so it must not be
+                    # supported
+                    yield path, CheckResult.FILE_NOT_SUPPORTED
+
+            index += 1
+
+    def discovered():
+        """ Return each checkable file found in the inputs; see discover().
+
+            If verbose, every file is discovered before any file is checked, so that the progress
+            of each file is shown against the final total, exactly the same for identical runs.
+        """
+
+        if reporter.is_verbose:
+            return iter(list(discover()))
+
+        return discover()
+
+    def saving(checked_inputs):
+        """ Yield each checked input, appending its result to saved. """
+
+        for path, (file_result, checked) in checked_inputs:
+            violations = file_result.violations if checked == CheckResult.FILE_CHECKED else []
+
+            saved.append((indices.popleft(), path, checked, file_result.encoding, violations))
+
+            yield path, (file_result, checked)
+
+    severe_rules = [rule for rule in rules if rule.severity == RuleViolation.DENY]
+
+    if fail_fast and 0 < len(severe_rules) < len(rules):
+        is_verbose = reporter.is_verbose
+
+        reporter.is_verbose = False
+
+        try:
+            result = accumulated_report(check_in_stages(discovered(), severe_rules, reporter,
+                                                        jobs, backend, timings, longest_first,
+                                                        timeout, coordinator, fail_fast,
+                                                        load_discovered, cache))
+        finally:
+            reporter.is_verbose = is_verbose
+
+        if result.num_severe_violations > 0:
+            return result
+
+        # no severe violations; check the remaining rules, as usual, on a fresh discovery
+        rules = [rule for rule in rules if rule not in severe_rules]
+
+        reporter.files_total = 0
+        reporter.files_encountered = 0
+
+        # inputs that could not be checked have already been diagnosed
+        return accumulated_report(
+            (path, (file_result, checked)) for path, (file_result, checked)
+            in check_in_stages(discovered(), rules, reporter, jobs, backend,
+                               timings, longest_first, timeout, coordinator, fail_fast,
+                               load_discovered, cache)
+            if checked in [CheckResult.FILE_CHECKED, CheckResult.FILE_SKIPPED,
+                           CheckResult.FILE_GENERATED])
+
+    # run the actual checks on each file as soon as it has been discovered
+    checked_inputs = check_in_stages(discovered(), rules, reporter, jobs, backend,
+                                     timings, longest_first, timeout, coordinator, fail_fast,
+                                     load_discovered, cache)
+
+    if saved is not None:
+        checked_inputs = saving(checked_inputs)
+
+    return accumulated_report(checked_inputs)
+
+
+def make_text_report(text: bytes, filename: str, rules: list, reporter: Reporter) -> CheckResult:
+    """ Run checks on a text, as if read from a file with the specified filename, and print a
+        report.
+
+        No file is ever read; the file does not even have to exist.
+    """
+
+    checked, decoded_text, encoding, data = load_from(filename, text)
+
+    if checked == CheckResult.FILE_CHECKED:
+        reporter.files_total += 1
+
+        checked_input = check_loaded(filename, decoded_text, encoding, rules, reporter, data)
+    else:
+        checked_input = CheckResult(), checked
+
+    return accumulated_report([(filename, checked_input)])
+
+
+def make_merged_report(paths: list, reporter: Reporter) -> (CheckResult, list):
+    """ Merge the saved results of every shard and print a report, exactly as if every file had
+        been checked in a single run.
+
+        Return the result and the rules that were checked.
+    """
+
+    names, results = load_results(paths)
+
+    rules_by_name = {rule.name: rule for rule in Rule.rules_in([comply.rules.standard])}
+
+    for name in names:
+        if name not in rules_by_name:
+            raise ValueError('Rule \'{0}\' does not exist'.format(name))
+
+    rules = [rules_by_name[name] for name in names]
+
+    return accumulated_report(check_merged(results, rules, reporter)), rules
+
+
+def accumulated_report(checked_inputs) -> CheckResult:
+    """ Return the accumulated result of every checked input, printing a diagnostic for any
+        input that was not checked.
+    """
 
     def not_checked(path: str, type: str, reason: str):
         """ Print a diagnostic stating when a file was not checked. """
@@ -194,50 +564,34 @@ def make_report(inputs: list, rules: list, reporter: Reporter) -> CheckResult:
             printdiag('{type} \'{path}\' was not checked.'.format(
                 type=type, path=path))
 
-    checkable_inputs = []
-
-    # find all valid files from provided inputs
-    for path in inputs:
-        paths = find_checkable_files(path)
-
-        if len(paths) > 0:
-            # one or more valid files were found
-            checkable_inputs.extend(paths)
-        else:
-            # no valid files were found in this path
-            if os.path.isdir(path):
-                # the path was a directory, but no valid files were found inside
-                not_checked(path, type='Directory', reason='no files found')
-            else:
-                # the path was a single file, but not considered valid so it must not be supported
-                not_checked(path, type='File', reason='file not supported')
-
-    # sort paths for consistent output per identical run
-    checkable_inputs = sorted(checkable_inputs)
-
     result = CheckResult()
 
-    # set the total number of files we expect to report on
-    reporter.files_total = len(checkable_inputs)
-
-    # finally run the actual checks on each discovered file
-    for path in checkable_inputs:
-        file_result, checked = check(path, rules, reporter)
-
+    for path, (file_result, checked) in checked_inputs:
         if checked == CheckResult.FILE_CHECKED:
             # file was checked and results were reported if any
             result += file_result
         elif checked == CheckResult.FILE_SKIPPED:
             # file was fine but not checked (it should still count toward the total)
             result += file_result
+        elif checked == CheckResult.FILE_GENERATED:
+            # file was deliberately left out; only summarized
+            result.num_files_generated += 1
         else:
             # file was not checked, for any number of reasons
             reason = None
 
+            if checked == CheckResult.NO_FILES_FOUND:
+                not_checked(path, type='Archive' if is_archive(path) else 'Directory',
+                            reason='no files found')
+
+                continue
+
             if checked == CheckResult.FILE_NOT_FOUND:
                 reason = 'file not found'
             elif checked == CheckResult.FILE_NOT_READ:
                 reason = 'file not read'
+            elif checked == CheckResult.FILE_TIMED_OUT:
+                reason = 'file timed out'
 
             not_checked(path, type='File', reason=reason)
 
@@ -303,6 +657,16 @@ def print_report(report: CheckResult):
                       files=files_format))
 
 
+def print_left_out(report: CheckResult):
+    """ Print the number of files left out of a report. """
+
+    generated_grammar = 'file' if report.num_files_generated == 1 else 'files'
+
+    printdiag('Left out {num_files} generated {files}'
+              .format(num_files=report.num_files_generated,
+                      files=generated_grammar))
+
+
 def main():
     """ Entry point for invoking the comply module. """
 
@@ -324,6 +688,22 @@ def main():
 
     arguments = docopt(__doc__, version='comply ' + __version__)
 
+    if arguments['worker']:
+        try:
+            address = parse_address(arguments['<address>'])
+        except ValueError as error:
+            printdiag('{0}.'.format(error), as_error=True)
+
+            sys.exit(EXIT_CODE_FAILURE)
+
+        if not run_worker(address):
+            printdiag('Worker could not be served by \'{0}\'.'.format(arguments['<address>']),
+                      as_error=True)
+
+            sys.exit(EXIT_CODE_FAILURE)
+
+        sys.exit(EXIT_CODE_SUCCESS)
+
     enable_profiling = arguments['--profile']
 
     comply.PROFILING_IS_ENABLED = enable_profiling
@@ -364,16 +744,165 @@ def main():
         printdiag('Suppressing similar violations; results may be omitted '
                   '(set `--strict` to show everything)')
 
+    time_started_report = datetime.datetime.now()
+
+    if arguments['merge']:
+        try:
+            report, rules = make_merged_report(arguments['<results>'], reporter)
+        except (OSError, ValueError, KeyError) as error:
+            printdiag('Results could not be merged ({0}).'.format(error), as_error=True)
+
+            sys.exit(EXIT_CODE_FAILURE)
+
+        exit_with_report(report, rules, reporter, since_starting=time_started_report)
+
+    if arguments['--stdin']:
+        report = make_text_report(sys.stdin.buffer.read(), arguments['--stdin-filename'],
+                                  rules, reporter)
+
+        exit_with_report(report, rules, reporter, since_starting=time_started_report)
+
+    jobs = (int(arguments['--jobs'])
+            if arguments['--jobs'] is not None
+            else available_cpu_count())
+
+    backend = make_backend(arguments['--backend'])
+
+    longest_first = arguments['--longest-first']
+
+    if longest_first and arguments['--cache']:
+        # files checked out of order could be reported before the files sharing their content
+        printdiag('Results can not be cached when checking the most costly files first; '
+                  'set either `--cache` or `--longest-first`.', as_error=True)
+
+        sys.exit(EXIT_CODE_FAILURE)
+
+    # timings are recorded when profiling, and used to estimate the cost of checking each file
+    timings = (load_timings(TIMINGS_FILENAME)
+               if enable_profiling or longest_first
+               else None)
+
+    timeout = (float(arguments['--file-timeout'])
+               if arguments['--file-timeout'] is not None
+               else None)
+
+    shard = (make_shard(arguments['--shard'])
+             if arguments['--shard'] is not None
+             else None)
+
+    results_path = arguments['--save-results']
+
+    saved = [] if results_path is not None else None
+
+    if saved is not None and reporter.limit is not None:
+        # every violation must be saved for the limit to apply across all shards
+        printdiag('Reporting limit is ignored when saving results; '
+                  'set `--limit` when merging instead')
+
+        reporter.limit = None
+
+    fail_fast = arguments['--fail-fast']
+
+    if saved is not None and fail_fast:
+        # every file must be checked for its results to be merged with other shards
+        printdiag('Failing fast is ignored when saving results')
+
+        fail_fast = False
+
+    coordinator = None
+
+    if arguments['serve-work']:
+        try:
+            coordinator = Coordinator(parse_address(arguments['--address']),
+                                      [rule.name for rule in rules],
+                                      comply.PROFILING_IS_ENABLED)
+        except (OSError, ValueError) as error:
+            printdiag('Work could not be served ({0}).'.format(error), as_error=True)
+
+            sys.exit(EXIT_CODE_FAILURE)
+
+        host, port = coordinator.address
+
+        printdiag('Serving work on {0}:{1}; waiting for workers'.format(host, port))
+
     inputs = arguments['<input>']
 
-    time_started_report = datetime.datetime.now()
+    excluded = (expand_params(arguments['--exclude']) +
+                load_excluded_patterns(IGNORE_FILENAME))
+
+    find_files = (find_tracked_files
+                  if arguments['--git-files']
+                  else find_checkable_files)
 
-    report = make_report(inputs, rules, reporter)
+    database_path = arguments['--compile-commands']
 
-    should_emit_verbose_diagnostics = reporter.is_verbose and report.num_files > 0
+    if database_path is not None:
+        try:
+            translation_units = load_compilation_database(database_path)
+        except (OSError, ValueError) as error:
+            printdiag('Compilation database could not be read ({0}).'.format(error),
+                      as_error=True)
+
+            sys.exit(EXIT_CODE_FAILURE)
+
+        # the database is checked as an input of its own, holding every translation unit
+        inputs = [database_path] + inputs
+
+        find_files = compiled_files_finder(database_path, translation_units, find_files)
+
+    listing_path = arguments['--files-from']
+
+    if listing_path is not None:
+        if listing_path != '-' and not os.path.isfile(listing_path):
+            printdiag('Paths could not be read from \'{0}\'.'.format(listing_path),
+                      as_error=True)
+
+            sys.exit(EXIT_CODE_FAILURE)
+
+        # paths are checked in the order listed, as soon as each path has been read
+        inputs = find_listed_paths(listing_path)
+
+    max_file_size = (int(arguments['--max-file-size'])
+                     if arguments['--max-file-size'] is not None
+                     else None)
+
+    cache = (ResultCache(CACHE_FILENAME)
+             if arguments['--cache']
+             else None)
+
+    try:
+        report = make_report(inputs, rules, reporter, jobs=jobs, backend=backend,
+                             timings=timings, longest_first=longest_first, timeout=timeout,
+                             shard=shard, saved=saved, coordinator=coordinator,
+                             fail_fast=fail_fast, excluded=excluded, find_files=find_files,
+                             in_order=listing_path is not None,
+                             skip_generated=arguments['--skip-generated'],
+                             max_file_size=max_file_size, cache=cache)
+    except Abandoned as error:
+        printdiag('Work could not be finished ({0}).'.format(error), as_error=True)
+
+        sys.exit(EXIT_CODE_FAILURE)
+
+    if cache is not None:
+        cache.save()
+
+    if enable_profiling:
+        save_timings(TIMINGS_FILENAME, timings)
+
+    if saved is not None:
+        save_results(results_path, shard if shard is not None else (1, 1), rules, saved)
+
+    exit_with_report(report, rules, reporter, since_starting=time_started_report)
+
+
+def exit_with_report(report: CheckResult, rules: list, reporter: Reporter, since_starting):
+    """ Print any diagnostics summarizing a report and exit. """
+
+    should_emit_verbose_diagnostics = (reporter.is_verbose and
+                                       (report.num_files > 0 or report.num_files_generated > 0))
 
     if should_emit_verbose_diagnostics:
-        print_rules_checked(rules, since_starting=time_started_report)
+        print_rules_checked(rules, since_starting=since_starting)
 
     if comply.PROFILING_IS_ENABLED:
         print_profiling_results(rules)
@@ -381,6 +910,10 @@ def main():
     if should_emit_verbose_diagnostics:
         print_report(report)
 
+    if report.num_files_generated > 0:
+        # files are only left out when asked to; always let it be known how many
+        print_left_out(report)
+
     if report.num_severe_violations > 0:
         # everything went fine; severe violations were encountered
         sys.exit(EXIT_CODE_SUCCESS_WITH_SEVERE_VIOLATIONS)
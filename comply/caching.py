@@ -0,0 +1,646 @@
+# coding=utf-8
+
+"""
+Provides a persistent cache of results, letting files that have not changed since an earlier run
+be reported without being read or checked again.
+
+Results are kept in a single file made of five parts: a manifest of the files seen by earlier
+runs, an index of results, an index of prepared artifacts, a table of rules, and finally the
+violations of each result, by rule, and the contents of each artifact. The manifest and the
+indices are packed as records of a fixed size, sorted by key, and searched in place through
+a memory map; violations and artifacts are only read, and deserialized, once needed.
+
+Violations found by a rule are only reused for as long as the fingerprint of the rule stays the
+same (see Rule.fingerprint), so changing one rule only has that rule collect violations again.
+Each result refers to the rules it was found by through the table of rules, rather than naming
+each rule again.
+
+Artifacts are the stripped and collapsed text of a file, as prepared for checking (see CheckFile).
+They only depend on the content of a file, never its name nor any rules, so a file examined again
+by changed, or new, rules is not stripped again. Each is kept as the changes made to the text it
+was prepared from, rather than as a copy of the text (see stripping.changes_between()).
+"""
+
+import os
+import json
+import mmap
+import bisect
+import time
+import struct
+import hashlib
+
+from typing import List
+
+from comply.version import __version__
+from comply.rules.rule import Rule, RuleViolation
+from comply.rules.report import CheckFile
+from comply.checking import split_filename
+
+CACHE_FILENAME = '.comply-cache'
+
+# identifies a cache file, and the format it was written in
+CACHE_SIGNATURE = b'comply\x00\x03'
+
+# the signature, the number of files in the manifest, the number of results and artifacts in each
+# index and the length of the table of rules
+CACHE_HEADER = struct.Struct('<8sIIII')
+
+# the digest of a path, the time it was last modified (in nanoseconds), its size and inode,
+# and the digest of its data
+FILE_RECORD = struct.Struct('<20sqqq20s')
+
+# the key of a result, the fingerprint of the rules it was last completed by, and where to find
+# its violations (offset and length)
+RESULT_RECORD = struct.Struct('<20s20sQI')
+
+# the key of an artifact, and where to find its contents (offset and length)
+ARTIFACT_RECORD = struct.Struct('<20sQI')
+
+# files modified this recently (in nanoseconds) are not trusted to be unchanged later on, as they
+# could be modified again without the time of modification changing
+UNCHANGED_INTERVAL = 2 * 1000 * 1000 * 1000
+
+# the most results kept; results not used by the latest run are the first to go
+MAX_RESULTS = 200000
+# the most artifacts kept; likewise
+MAX_ARTIFACTS = 200000
+
+# the number of characters a file must reach for its artifacts to be kept; a shorter file is
+# stripped about as fast as its artifacts can be kept and restored
+ARTIFACT_THRESHOLD = 1024
+
+
+def fingerprint_of(fingerprints: dict) -> bytes:
+    """ Return a fingerprint of a set of rules, from the fingerprint of each rule, by name.
+
+        A result completed by one set of rules can be reused in full, without looking at the
+        violations of each rule, for the same fingerprint.
+    """
+
+    digest = hashlib.sha1()
+
+    for name in sorted(fingerprints):
+        digest.update('{0}={1}\n'.format(name, fingerprints[name]).encode('utf-8'))
+
+    return digest.digest()
+
+
+def sources_fingerprint() -> bytes:
+    """ Return a fingerprint of the version and sources of comply, except for the sources of
+        rules; any change to the way texts are prepared for checking changes the fingerprint.
+
+        Rules are found in the packages of comply.rules, and are fingerprinted on their own.
+    """
+
+    digest = hashlib.sha1(__version__.encode('utf-8'))
+
+    package_path = os.path.dirname(os.path.abspath(__file__))
+    rules_path = os.path.join(package_path, 'rules')
+
+    for directory, directory_names, filenames in os.walk(package_path):
+        if directory == rules_path:
+            # only the modules shared by every rule are part of the fingerprint
+            directory_names.clear()
+
+        directory_names.sort()
+
+        for filename in sorted(filenames):
+            if not filename.endswith('.py'):
+                continue
+
+            path = os.path.join(directory, filename)
+
+            with open(path, 'rb') as file:
+                digest.update(os.path.relpath(path, package_path).encode('utf-8') + b'\x00')
+                digest.update(file.read())
+
+    return digest.digest()
+
+
+def path_key(path: str, working_directory: str) -> bytes:
+    """ Return the key of a path, relative to a working directory, in the manifest. """
+
+    absolute_path = os.path.normpath(os.path.join(working_directory, path))
+
+    return hashlib.sha1(os.fsencode(absolute_path)).digest()
+
+
+class PackedRecords:
+    """ Represents a sequence of packed records, sorted by the key leading each record. """
+
+    def __init__(self, buffer, offset: int, count: int, record: struct.Struct):
+        self.buffer = buffer
+        self.offset = offset
+        self.count = count
+        self.record = record
+
+        # the index of the first record led by each byte, followed by the number of records
+        self.fanout = [bisect.bisect_left(self, bytes([byte])) for byte in range(256)] + [count]
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index: int) -> bytes:
+        """ Return the key of a record; this is all that is needed to search for one. """
+
+        start = self.offset + index * self.record.size
+
+        return self.buffer[start:start + 20]
+
+    def find(self, key: bytes) -> tuple:
+        """ Return the record led by a key, or None if there is no such record. """
+
+        # only records led by the same byte need to be searched
+        lower, upper = self.fanout[key[0]], self.fanout[key[0] + 1]
+
+        index = bisect.bisect_left(self, key, lower, upper)
+
+        if index < upper and self[index] == key:
+            return self.record.unpack_from(self.buffer, self.offset + index * self.record.size)
+
+        return None
+
+    def records(self):
+        """ Yield every record, in order. """
+
+        for index in range(self.count):
+            yield self.record.unpack_from(self.buffer, self.offset + index * self.record.size)
+
+
+class ResultCache:
+    """ Represents the results of earlier runs, along with any new results to keep for later runs.
+
+        Results are looked up, and stored, for the rules in use; see use().
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+        # paths are looked up in the manifest as absolute paths; the working directory is only
+        # looked up once
+        self.working_directory = os.getcwd()
+
+        # the contents of the cache file, if any; mapped rather than read
+        self.buffer = None
+
+        self.files = PackedRecords(b'', 0, 0, FILE_RECORD)
+        self.results = PackedRecords(b'', 0, 0, RESULT_RECORD)
+        self.artifacts = PackedRecords(b'', 0, 0, ARTIFACT_RECORD)
+
+        self.contents_offset = 0
+
+        # the name and fingerprint of each rule that has found any result, and each set of rules
+        # (as indices of the former) that has completed any result; both are only ever added to,
+        # so that results kept as they were found keep referring to the same rules
+        self.rules = []
+        self.rule_sets = []
+
+        # results are only reused by the same version of comply
+        self.sources_fingerprint = sources_fingerprint()
+
+        # the rules in use, by name, their fingerprints, and the fingerprint of the set
+        self.rules_in_use = {}
+        self.fingerprints = {}
+        self.fingerprint = None
+
+        # the index of each rule in use, by name
+        self.rule_indices = {}
+        # the index of each set of rules, by its indices
+        self.rule_set_indices = {}
+        # the rules in use of each set of rules, by index of the rule, by index of the set
+        self.rules_in_use_by_set = {}
+
+        # the stat of each file looked up, by its key
+        self.looked_up = {}
+        # the digest of each file found unchanged, by its path
+        self.unchanged = {}
+        # the record of each file seen for the first time, or since it changed, by its key
+        self.remembered = {}
+        # the fingerprint of the rules completing each new result, and its encoding and
+        # violations, serialized, by its key
+        self.stored = {}
+        # the changes of each new artifact, and of each artifact restored, by its key
+        self.prepared = {}
+        self.restored = {}
+        # the key of each result, or artifact, reused or stored
+        self.used = set()
+
+        try:
+            with open(path, 'rb') as file:
+                if os.fstat(file.fileno()).st_size > 0:
+                    self.buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return
+
+        if self.buffer is None or len(self.buffer) < CACHE_HEADER.size:
+            return
+
+        (signature, num_files, num_results, num_artifacts,
+         rules_length) = CACHE_HEADER.unpack_from(self.buffer)
+
+        results_offset = CACHE_HEADER.size + num_files * FILE_RECORD.size
+        artifacts_offset = results_offset + num_results * RESULT_RECORD.size
+        rules_offset = artifacts_offset + num_artifacts * ARTIFACT_RECORD.size
+        contents_offset = rules_offset + rules_length
+
+        if signature != CACHE_SIGNATURE or contents_offset > len(self.buffer):
+            # not a cache file, or one written by a different version of comply
+            return
+
+        try:
+            rules, rule_sets = json.loads(
+                bytes(self.buffer[rules_offset:contents_offset]).decode('utf-8'))
+
+            self.rules = [(str(name), str(fingerprint)) for name, fingerprint in rules]
+            self.rule_sets = [tuple(int(index) for index in rule_set) for rule_set in rule_sets]
+        except (ValueError, TypeError):
+            self.rules = []
+            self.rule_sets = []
+
+            return
+
+        self.rule_set_indices = {rule_set: index for index, rule_set in enumerate(self.rule_sets)}
+
+        self.files = PackedRecords(self.buffer, CACHE_HEADER.size, num_files, FILE_RECORD)
+        self.results = PackedRecords(self.buffer, results_offset, num_results, RESULT_RECORD)
+        self.artifacts = PackedRecords(self.buffer, artifacts_offset, num_artifacts,
+                                       ARTIFACT_RECORD)
+
+        self.contents_offset = contents_offset
+
+    def use(self, rules: List[Rule]):
+        """ Use a set of rules for every result looked up, or stored, from now on. """
+
+        self.rules_in_use = {rule.name: rule for rule in rules}
+        self.fingerprints = {rule.name: rule.fingerprint for rule in rules}
+        self.fingerprint = fingerprint_of(self.fingerprints)
+
+        indices = {rule: index for index, rule in enumerate(self.rules)}
+
+        self.rule_indices = {}
+
+        for name, fingerprint in sorted(self.fingerprints.items()):
+            if (name, fingerprint) not in indices:
+                indices[(name, fingerprint)] = len(self.rules)
+
+                self.rules.append((name, fingerprint))
+
+            self.rule_indices[name] = indices[(name, fingerprint)]
+
+        self.rules_in_use_by_set = {}
+
+    def digest_of_unchanged(self, path: str) -> bytes:
+        """ Return the digest of the file found at path, if it has not changed since an earlier
+            run; otherwise, return None.
+
+            The file is never read; it is unchanged if it has the same time of modification,
+            size and inode as when last seen.
+        """
+
+        try:
+            stat = os.stat(path)
+        except (OSError, ValueError):
+            return None
+
+        key = path_key(path, self.working_directory)
+
+        looked_up = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+        self.looked_up[key] = looked_up
+
+        record = self.files.find(key)
+
+        if record is None:
+            return None
+
+        key, modified, size, inode, digest = record
+
+        if (modified, size, inode) != looked_up:
+            return None
+
+        self.unchanged[path] = digest
+
+        return digest
+
+    def remember(self, path: str, digest: bytes):
+        """ Remember the digest of the data read from the file found at path, as of when it
+            was looked up.
+        """
+
+        key = path_key(path, self.working_directory)
+
+        looked_up = self.looked_up.get(key)
+
+        if looked_up is None:
+            # the file was never looked up; e.g. it was found in an archive
+            return
+
+        modified, size, inode = looked_up
+
+        if modified > time.time() * 1000 * 1000 * 1000 - UNCHANGED_INTERVAL:
+            return
+
+        record = (key, modified, size, inode, digest)
+
+        if self.files.find(key) != record:
+            self.remembered[key] = record
+
+    def result_key(self, digest: bytes, path: str) -> bytes:
+        """ Return the key of a result for a file found at path, holding data of a digest.
+
+            Rules may look at the name of a file, but never its directory; the key holds only the
+            name.
+        """
+
+        filename, extension = split_filename(path)
+
+        name = os.fsencode(filename) + b'\x00' + os.fsencode(extension)
+
+        return hashlib.sha1(digest + self.sources_fingerprint + name).digest()
+
+    def has_results(self, key: bytes) -> bool:
+        """ Determine whether there is a result for a key, completed by every rule in use. """
+
+        stored = self.stored.get(key)
+
+        if stored is not None:
+            return stored[0] == self.fingerprint
+
+        record = self.results.find(key)
+
+        return record is not None and record[1] == self.fingerprint
+
+    def serialized(self, key: bytes) -> list:
+        """ Return the encoding of a result, the index of the set of rules it was found by, and
+            the serialized violations of each rule (by index) that found any; or None if there
+            is no such result, or it is corrupt.
+        """
+
+        stored = self.stored.get(key)
+
+        if stored is not None:
+            return stored[1]
+
+        record = self.results.find(key)
+
+        if record is None:
+            return None
+
+        offset, length = record[2:]
+
+        start = self.contents_offset + offset
+
+        try:
+            serialized = json.loads(bytes(self.buffer[start:start + length]).decode('utf-8'))
+        except ValueError:
+            return None
+
+        if not isinstance(serialized, list) or len(serialized) != 3:
+            return None
+
+        return serialized
+
+    def load(self, key: bytes) -> (str, dict):
+        """ Return the encoding of a result, and the violations found by each rule in use, by
+            name; or None if there is no such result.
+
+            Rules that have changed since the result was found, or that were not used, are
+            left out.
+        """
+
+        serialized = self.serialized(key)
+
+        if serialized is None:
+            # the result is missing or corrupt; check the file again, as if it was never checked
+            return None
+
+        encoding, rule_set, found = serialized
+
+        try:
+            rules = self.rules_in_use_by_set.get(rule_set)
+
+            if rules is None:
+                rules = {index: self.rules[index][0] for index in self.rule_sets[rule_set]
+                         if self.rule_indices.get(self.rules[index][0]) == index}
+
+                self.rules_in_use_by_set[rule_set] = rules
+
+            violations = {name: [] for name in rules.values()}
+
+            for index, rule_violations in found:
+                if index in rules:
+                    violations[rules[index]] = [
+                        RuleViolation.deserialized(violation, self.rules_in_use)
+                        for violation in rule_violations]
+        except (KeyError, ValueError, TypeError, IndexError):
+            return None
+
+        self.used.add(key)
+
+        return encoding, violations
+
+    def store(self, key: bytes, encoding: str, violations: dict):
+        """ Store the encoding of a result, and the violations found by each rule, by name, for
+            later runs.
+
+            Violations found by any other rule, as stored by an earlier run, are kept.
+        """
+
+        rule_set = set(self.rule_indices[name] for name in violations)
+
+        found = {self.rule_indices[name]: [violation.serialized() for violation in rule_violations]
+                 for name, rule_violations in violations.items() if len(rule_violations) > 0}
+
+        serialized = self.serialized(key)
+
+        if serialized is not None and serialized[0] == encoding:
+            try:
+                kept = set(index for index in self.rule_sets[serialized[1]]
+                           if self.rules[index][0] not in violations)
+
+                rule_set.update(kept)
+
+                found.update((index, rule_violations) for index, rule_violations in serialized[2]
+                             if index in kept)
+            except (TypeError, ValueError, IndexError):
+                pass
+
+        rule_set = tuple(sorted(rule_set))
+
+        if rule_set not in self.rule_set_indices:
+            self.rule_set_indices[rule_set] = len(self.rule_sets)
+
+            self.rule_sets.append(rule_set)
+
+        self.stored[key] = (self.fingerprint, [encoding, self.rule_set_indices[rule_set],
+                                               [[index, found[index]] for index in sorted(found)]])
+
+        self.used.add(key)
+
+    def artifact_key(self, digest: bytes) -> bytes:
+        """ Return the key of the artifacts prepared from a file holding data of a digest. """
+
+        return hashlib.sha1(b'prepared\x00' + digest + self.sources_fingerprint).digest()
+
+    def restore_prepared(self, digest: bytes, file: CheckFile):
+        """ Restore the stripped and collapsed text of a file, holding data of a digest, as
+            prepared by an earlier run; anything not prepared by then is prepared as usual.
+        """
+
+        if len(file.original) < ARTIFACT_THRESHOLD:
+            return
+
+        key = self.artifact_key(digest)
+
+        changes = self.prepared.get(key)
+
+        if changes is None:
+            record = self.artifacts.find(key)
+
+            if record is None:
+                return
+
+            offset, length = record[1:]
+
+            start = self.contents_offset + offset
+
+            try:
+                changes = json.loads(bytes(self.buffer[start:start + length]).decode('utf-8'))
+            except ValueError:
+                return
+
+            if not isinstance(changes, list) or len(changes) != 2:
+                # the artifact is corrupt; the file is prepared as if it never was
+                return
+
+        file.restore(changes)
+
+        self.restored[key] = changes
+
+        self.used.add(key)
+
+    def keep_prepared(self, digest: bytes, file: CheckFile):
+        """ Keep the stripped and collapsed text of a file, holding data of a digest, for later
+            runs; only if prepared, and not already kept.
+        """
+
+        if len(file.original) < ARTIFACT_THRESHOLD:
+            return
+
+        key = self.artifact_key(digest)
+
+        changes = self.prepared.get(key, self.restored.get(key))
+
+        prepared_changes = file.prepared_changes()
+
+        if changes is not None:
+            # anything prepared by an earlier run, but not needed by this one, is kept as well
+            prepared_changes = [prepared if prepared is not None else earlier
+                                for prepared, earlier in zip(prepared_changes, changes)]
+
+        if prepared_changes != changes and prepared_changes[0] is not None:
+            self.prepared[key] = prepared_changes
+
+            self.used.add(key)
+
+    def save(self):
+        """ Save every result and artifact, along with the manifest of every file seen, for later
+            runs.
+
+            Nothing is saved if nothing has changed. If the cache file could not be written,
+            the results are lost, but nothing else happens.
+        """
+
+        if len(self.remembered) == 0 and len(self.stored) == 0 and len(self.prepared) == 0:
+            return
+
+        files = {record[0]: record for record in self.files.records()}
+        files.update(self.remembered)
+
+        # results are either kept as they were found, or serialized anew
+        results = {}
+
+        for key, fingerprint, offset, length in self.results.records():
+            start = self.contents_offset + offset
+
+            results[key] = fingerprint, bytes(self.buffer[start:start + length])
+
+        for key, (fingerprint, serialized) in self.stored.items():
+            results[key] = fingerprint, json.dumps(serialized,
+                                                   separators=(',', ':')).encode('utf-8')
+
+        artifacts = {}
+
+        for key, offset, length in self.artifacts.records():
+            start = self.contents_offset + offset
+
+            artifacts[key] = bytes(self.buffer[start:start + length])
+
+        for key, changes in self.prepared.items():
+            artifacts[key] = json.dumps(changes, separators=(',', ':')).encode('utf-8')
+
+        for kept, max_kept in ((results, MAX_RESULTS), (artifacts, MAX_ARTIFACTS)):
+            if len(kept) > max_kept:
+                unused = [key for key in kept if key not in self.used]
+
+                for key in unused[:len(kept) - max_kept]:
+                    del kept[key]
+
+        self.close()
+
+        packed_rules = json.dumps([self.rules, self.rule_sets],
+                                  separators=(',', ':')).encode('utf-8')
+
+        packed = [CACHE_HEADER.pack(CACHE_SIGNATURE, len(files), len(results), len(artifacts),
+                                    len(packed_rules))]
+
+        for key in sorted(files):
+            packed.append(FILE_RECORD.pack(*files[key]))
+
+        offset = 0
+
+        for key in sorted(results):
+            fingerprint, serialized = results[key]
+
+            packed.append(RESULT_RECORD.pack(key, fingerprint, offset, len(serialized)))
+
+            offset += len(serialized)
+
+        for key in sorted(artifacts):
+            packed.append(ARTIFACT_RECORD.pack(key, offset, len(artifacts[key])))
+
+            offset += len(artifacts[key])
+
+        packed.append(packed_rules)
+
+        for key in sorted(results):
+            packed.append(results[key][1])
+
+        for key in sorted(artifacts):
+            packed.append(artifacts[key])
+
+        # write to a temporary file first; a cache file is never seen half-written
+        temporary_path = '{0}.{1}'.format(self.path, os.getpid())
+
+        try:
+            with open(temporary_path, 'wb') as file:
+                file.write(b''.join(packed))
+
+            os.replace(temporary_path, self.path)
+        except OSError:
+            try:
+                os.remove(temporary_path)
+            except OSError:
+                pass
+
+    def close(self):
+        """ Stop mapping the contents of the cache file. """
+
+        if self.buffer is not None:
+            self.buffer.close()
+
+            self.buffer = None
+
+        self.files = PackedRecords(b'', 0, 0, FILE_RECORD)
+        self.results = PackedRecords(b'', 0, 0, RESULT_RECORD)
+        self.artifacts = PackedRecords(b'', 0, 0, ARTIFACT_RECORD)
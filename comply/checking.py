@@ -5,56 +5,49 @@ Provides functions for preparing and checking source files.
 """
 
 import os
-import glob
+import re
+import codecs
 import comply
 
-from typing import List
+from typing import List, Tuple
 
 from comply.reporting import Reporter
 from comply.rules.rule import Rule, RuleViolation
-from comply.rules.report import CheckFile, CheckResult
+from comply.rules.report import CheckFile, CheckBatch, CheckResult
 
-from comply.util.stripping import strip_any_comments, strip_any_literals
+from comply.util.scope import top_level_boundaries
 
 DEFAULT_ENCODING = 'utf8'
 
+# the byte order marks that determine the encoding of a file; longer marks must come first,
+# as the mark of UTF-32 (little-endian) begins with the mark of UTF-16 (little-endian)
+BYTE_ORDER_MARKS = [(codecs.BOM_UTF32_LE, 'utf-32-le'), (codecs.BOM_UTF32_BE, 'utf-32-be'),
+                    (codecs.BOM_UTF8, DEFAULT_ENCODING),
+                    (codecs.BOM_UTF16_LE, 'utf-16-le'), (codecs.BOM_UTF16_BE, 'utf-16-be')]
 
-def supported_file_types() -> tuple:
-    """ Return all supported and recognized source filetypes. """
 
-    return '.h', '.c'
+# the number of characters at the beginning of a file searched for a banner marking it as generated
+GENERATED_BANNER_LENGTH = 1024
 
+# a banner marking a file as generated by a tool, rather than written by hand; note that
+# headers filled in by configure (e.g. "Generated from config.h.in") are still maintained by hand
+GENERATED_BANNER_PATTERN = re.compile(
+    r'@generated|DO NOT EDIT|[Aa]utomatically generated|AUTOMATICALLY GENERATED')
 
-def find_checkable_files(path: str) -> list:
-    """ Return a list of all checkable files found in a path.
+# a file with lines longer than this, on average, is considered generated (e.g. tables of data)
+GENERATED_LINE_LENGTH = 200
 
-        If path is a directory, traverse through it and any subdirectories to find checkable files.
-
-        If path points to a non-supported file, it is *not* excluded.
-    """
 
-    supported_extensions = ''.join([extension[1:].lower() for extension in supported_file_types()])
-
-    # match file with supported extension in dir and all subdirs
-    pattern = '/**/*.[{extensions}]'.format(extensions=supported_extensions)
-
-    checkable_paths = []
-
-    if os.path.isdir(path):
-        # input is a directory; traverse it and any subdirectories looking for supported files
-        directory_pattern = path + pattern
+def supported_file_types() -> tuple:
+    """ Return all supported and recognized source filetypes. """
 
-        supported_filepaths = glob.glob(directory_pattern, recursive=True)
+    return '.h', '.c'
 
-        checkable_paths.extend(supported_filepaths)
-    else:
-        # input is a plain filepath
-        checkable_paths.append(path)
 
-    # remove potential duplicates
-    checkable_paths = list(set(checkable_paths))
+def supported_encodings() -> tuple:
+    """ Return all supported encodings, in the order they are attempted when reading a file. """
 
-    return checkable_paths
+    return DEFAULT_ENCODING, 'cp1252'
 
 
 def result_from_violations(violations: List[RuleViolation], is_strict: bool=False) -> CheckResult:
@@ -105,30 +98,35 @@ def check(path: str, rules: List[Rule], reporter: Reporter=None) -> (CheckResult
         Return a result and a code to determine whether the file was checked or not.
     """
 
-    result = CheckResult()
+    if reporter is not None and reporter.has_reached_reporting_limit:
+        # the file would not be checked anyway; don't bother reading it
+        return check_loaded(path, None, None, rules, reporter)
 
-    if (path is None
-            or len(path) == 0
-            or not os.path.exists(path)
-            or not os.path.isfile(path)):
-        return result, CheckResult.FILE_NOT_FOUND
+    checked, text, encoding, data = load(path)
 
-    filename, extension = os.path.splitext(path)
+    if checked != CheckResult.FILE_CHECKED:
+        return CheckResult(), checked
 
-    extension = extension.lower()
+    return check_loaded(path, text, encoding, rules, reporter, data)
 
-    if extension not in supported_file_types():
-        return result, CheckResult.FILE_NOT_SUPPORTED
 
-    filename = os.path.basename(filename)
+def check_loaded(path: str, text: str, encoding: str, rules: List[Rule], reporter: Reporter=None,
+                 data: bytes=None, file: CheckFile=None) -> (CheckResult, int):
+    """ Run a check on a text that has already been read from the file found at path.
 
-    text, encoding = read(path)
+        The data that the text was decoded from is made available to rules, if provided.
+        If the text has already been prepared for checking, the prepared file can be provided
+        instead of preparing it again.
 
-    if text is None:
-        return result, CheckResult.FILE_NOT_READ
+        Return a result and a code to determine whether the file was checked or not.
+    """
+
+    result = CheckResult()
+
+    filename, extension = split_filename(path)
 
     if reporter is not None:
-        reporter.files_encountered += 1
+        reporter.count_encountered_file()
 
         if reporter.has_reached_reporting_limit:
             result.num_files = 1
@@ -136,13 +134,15 @@ def check(path: str, rules: List[Rule], reporter: Reporter=None) -> (CheckResult
             return result, CheckResult.FILE_SKIPPED
 
         reporter.report_before_checking(
-            path, encoding=None if encoding is DEFAULT_ENCODING else encoding)
+            path, encoding=None if encoding == DEFAULT_ENCODING else encoding)
 
-    file = prepare(text, filename, extension, path)
+    if file is None:
+        file = prepare(text, filename, extension, path, data)
 
     violations = collect(file, rules, reporter)
 
     result = result_from_violations(violations, is_strict=reporter.is_strict)
+    result.encoding = encoding
 
     if reporter is not None:
         reporter.report_before_results(violations)
@@ -151,21 +151,167 @@ def check(path: str, rules: List[Rule], reporter: Reporter=None) -> (CheckResult
     return result, CheckResult.FILE_CHECKED
 
 
-def prepare(text: str, filename: str, extension: str, path: str=None) -> CheckFile:
-    """ Prepare a text for checking. """
+def split_filename(path: str) -> (str, str):
+    """ Return the filename (without extension) and lowercased extension of a path. """
+
+    filename, extension = os.path.splitext(path)
+
+    return os.path.basename(filename), extension.lower()
+
+
+def load(path: str) -> (int, str, str, bytes):
+    """ Return a code to determine whether the file found at path can be checked, along with
+        the text and encoding read from the file, and the data that the text was decoded from.
+
+        A supported file is read right away, without first looking it up; if it can not be
+        opened, it is considered not found.
+    """
+
+    if path is None or len(path) == 0:
+        return CheckResult.FILE_NOT_FOUND, None, None, None
+
+    filename, extension = split_filename(path)
+
+    if extension not in supported_file_types():
+        if not os.path.isfile(path):
+            return CheckResult.FILE_NOT_FOUND, None, None, None
+
+        return CheckResult.FILE_NOT_SUPPORTED, None, None, None
+
+    try:
+        text, encoding, data = read(path)
+    except (FileNotFoundError, IsADirectoryError, NotADirectoryError):
+        return CheckResult.FILE_NOT_FOUND, None, None, None
+    except OSError:
+        return CheckResult.FILE_NOT_READ, None, None, None
+
+    if text is None:
+        return CheckResult.FILE_NOT_READ, None, None, None
+
+    return CheckResult.FILE_CHECKED, text, encoding, data
+
+
+def load_from(path: str, data: bytes) -> (int, str, str, bytes):
+    """ Return a code to determine whether data can be checked as if read from the file found
+        at path, along with the text and encoding decoded from the data, and the data itself.
+
+        The file itself is never read; e.g. the data could be the unsaved contents of a file.
+    """
+
+    filename, extension = split_filename(path)
+
+    if extension not in supported_file_types():
+        return CheckResult.FILE_NOT_SUPPORTED, None, None, None
+
+    text, encoding = decode(data)
+
+    if text is None:
+        return CheckResult.FILE_NOT_READ, None, None, None
+
+    return CheckResult.FILE_CHECKED, text, encoding, data
+
+
+def is_generated(text: str) -> bool:
+    """ Determine whether a text appears to have been generated by a tool, rather than written
+        by hand.
+
+        A text is considered generated if it begins with a banner saying so (e.g. "DO NOT EDIT"
+        or "@generated"), or if its lines are, on average, too long to be written by hand.
+    """
+
+    if GENERATED_BANNER_PATTERN.search(text, 0, GENERATED_BANNER_LENGTH) is not None:
+        return True
+
+    num_lines = text.count('\n') + 1
+
+    return len(text) / num_lines > GENERATED_LINE_LENGTH
+
+
+def examine(path: str, text: str, rules: List[Rule]) -> List[RuleViolation]:
+    """ Run a check on a text read from the file found at path without reporting anything.
+
+        Return any collected violations.
+
+        The violations can later be reported through report_examined().
+    """
+
+    filename, extension = split_filename(path)
+
+    file = prepare(text, filename, extension, path)
+
+    return collect(file, rules)
+
+
+def examine_batch(paths_and_texts: List[Tuple[str, str]], rules: List[Rule]) -> List[List[RuleViolation]]:
+    """ Run a check on a batch of texts read from files without reporting anything.
+
+        Return any collected violations for each file, in the same order as provided.
+    """
+
+    files = []
+
+    for path, text in paths_and_texts:
+        filename, extension = split_filename(path)
+
+        files.append(prepare(text, filename, extension, path))
+
+    return collect_batch(files, rules)
+
+
+def report_examined(path: str, checked: int, encoding: str, violations: List[RuleViolation],
+                    rules: List[Rule], reporter: Reporter) -> (CheckResult, int):
+    """ Report the violations collected from examining the file found at path.
+
+        The reporter sees the same sequence of calls as it would for check(), which means that
+        the reported output is identical to that of checking the file directly.
+
+        Return a result and a code to determine whether the file was checked or not.
+    """
+
+    result = CheckResult()
+
+    if checked != CheckResult.FILE_CHECKED:
+        return result, checked
+
+    reporter.count_encountered_file()
+
+    if reporter.has_reached_reporting_limit:
+        result.num_files = 1
+
+        return result, CheckResult.FILE_SKIPPED
+
+    reporter.report_before_checking(
+        path, encoding=None if encoding == DEFAULT_ENCODING else encoding)
+
+    # violations are collected in order of rules, so cutting off the excess
+    # is equivalent to stopping the collection once the limit is reached
+    num_exceeding_reports = reporter.count_reports(len(violations))
+
+    if num_exceeding_reports > 0:
+        violations = violations[:-num_exceeding_reports]
+
+    n = len(rules)
+
+    for i in range(n):
+        reporter.report_progress(i + 1, n)
+
+    result = result_from_violations(violations, is_strict=reporter.is_strict)
+    result.encoding = encoding
+
+    reporter.report_before_results(violations)
+    reporter.report(violations, path)
+
+    return result, CheckResult.FILE_CHECKED
+
+
+def prepare(text: str, filename: str, extension: str, path: str=None, data: bytes=None) -> CheckFile:
+    """ Prepare a text for checking, along with the data it was decoded from, if available. """
 
     # remove form-feed characters to make sure line numbers are as expected
     original_text = text.replace('\u000c', '')
 
-    stripped_text = original_text
-
-    # remove comments and string literals to reduce chance of false-positives
-    # for stuff that isn't actually code
-    # start by stripping single-line literals; this will help stripping comments, as
-    # comment-starting characters could easily be found inside literals
-    stripped_text = strip_any_literals(stripped_text)
-    # finally strip both block and line-comments
-    stripped_text = strip_any_comments(stripped_text)
+    # comments and string literals are stripped once needed by a rule; see CheckFile.stripped
+    file = CheckFile(original_text, None, filename, extension, data)
 
     # debug code for comparing differences before/after stripping
     write_stripped_file = False
@@ -174,30 +320,87 @@ def prepare(text: str, filename: str, extension: str, path: str=None) -> CheckFi
         stripped_file_path = path + '.stripped'
 
         with open(stripped_file_path, 'w') as stripped_file:
-            stripped_file.write(stripped_text)
+            stripped_file.write(file.stripped)
+
+    return file
+
+
+def split(file: CheckFile, lines_per_chunk: int) -> List[Tuple[int, CheckFile]]:
+    """ Split a prepared file into chunks of at least a number of lines each.
+
+        Chunks are only split at top-level boundaries, leaving any scope (e.g. a function body)
+        intact. Return each chunk along with the number of lines preceding it in the file.
+
+        Every chunk, except the first, is led by the linebreak ending its preceding line; this
+        way, any pattern looking at characters preceding the first line of a chunk sees the
+        same characters as it would in the entire file.
+    """
+
+    boundaries = top_level_boundaries(file.stripped, lines_per_chunk)
+
+    chunks = []
+
+    starting_index = 0
 
-    return CheckFile(original_text, stripped_text, filename, extension)
+    for ending_index in boundaries + [len(file.original)]:
+        leading_index = starting_index - 1 if starting_index > 0 else 0
 
+        chunk = CheckFile(file.original[leading_index:ending_index],
+                          file.stripped[leading_index:ending_index],
+                          file.filename,
+                          file.extension)
 
-def read(path: str) -> (str, str):
-    """ Return text and encoding used to read from file found at path.
+        chunks.append((file.original.count('\n', 0, leading_index), chunk))
+
+        starting_index = ending_index
+
+    return chunks
+
+
+def read(path: str) -> (str, str, bytes):
+    """ Return text and encoding used to read from file found at path, along with the data
+        that the text was decoded from.
+
+        The file is only read once, no matter how many encodings are attempted; see decode().
 
         Return None if file could not be read with any supported encoding.
     """
 
-    supported_encodings = [
-        DEFAULT_ENCODING,
-        'cp1252'
-    ]
+    with open(path, 'rb') as file:
+        data = file.read()
 
-    for encoding in supported_encodings:
-        try:
-            with open(path, 'r', encoding=encoding) as file:
-                text = file.read()
+    text, encoding = decode(data)
+
+    return text, encoding, data
+
+
+def decode(data: bytes) -> (str, str):
+    """ Return text and encoding used to decode data read from a file.
 
-                return text, encoding
+        If the data begins with a byte order mark, the encoding it indicates is attempted
+        first; otherwise, each supported encoding is attempted in order. Any byte order mark
+        is kept as part of the text.
+
+        Linebreaks are translated exactly as when reading a file as text.
+
+        Return None if data could not be decoded with any supported encoding.
+    """
+
+    encodings = list(supported_encodings())
+
+    for byte_order_mark, encoding in BYTE_ORDER_MARKS:
+        if data.startswith(byte_order_mark):
+            encodings.insert(0, encoding)
+
+            break
+
+    for encoding in encodings:
+        try:
+            text = data.decode(encoding)
         except UnicodeDecodeError:
-            pass
+            continue
+
+        return text.replace('\r\n', '\n').replace('\r', '\n'), encoding
 
     return None, None
 
@@ -209,20 +412,17 @@ def collect(file: CheckFile, rules: List[Rule], reporter: Reporter=None) -> List
 
     for i, rule in enumerate(rules):
         if comply.PROFILING_IS_ENABLED:
-            rule.profile_begin()
+            time_started_collecting = rule.profile_begin()
 
         offenders = rule.collect(file)
 
         if comply.PROFILING_IS_ENABLED:
-            rule.profile_end()
+            rule.profile_end(time_started_collecting)
 
-        if reporter is not None and reporter.limit is not None:
-            reporter.reports += len(offenders)
-
-            if reporter.reports > reporter.limit:
-                num_exceeding_reports = reporter.reports - reporter.limit
-                reporter.reports = reporter.limit
+        if reporter is not None:
+            num_exceeding_reports = reporter.count_reports(len(offenders))
 
+            if num_exceeding_reports > 0:
                 offenders = offenders[:-num_exceeding_reports]
 
         violations.extend(offenders)
@@ -241,3 +441,34 @@ def collect(file: CheckFile, rules: List[Rule], reporter: Reporter=None) -> List
             reporter.report_progress(i + 1, n)
 
     return violations
+
+
+def collect_batch(files: List[CheckFile], rules: List[Rule]) -> List[List[RuleViolation]]:
+    """ Return a list of all collected violations for each file in a batch of files.
+
+        Rules providing a screening pattern search for it across the entire batch in one pass,
+        and only collect violations from files where it was found.
+    """
+
+    batch = CheckBatch(files)
+
+    violations = [[] for _ in files]
+
+    for rule in rules:
+        if comply.PROFILING_IS_ENABLED:
+            time_started_collecting = rule.profile_begin()
+
+        pattern = rule.screening_pattern
+
+        if pattern is not None:
+            file_indices = batch.indices_of_files_matching(pattern)
+        else:
+            file_indices = range(len(files))
+
+        for file_index in file_indices:
+            violations[file_index].extend(rule.collect(files[file_index]))
+
+        if comply.PROFILING_IS_ENABLED:
+            rule.profile_end(time_started_collecting)
+
+    return violations
@@ -0,0 +1,498 @@
+# coding=utf-8
+
+"""
+Provides functions for discovering checkable files.
+
+Directories are walked one entry at a time, yielding each checkable file as soon as it is found,
+in the same order as if every path had been found first and then sorted. Excluded directories
+are never descended into.
+
+Alternatively, files tracked by git can be listed straight from the index of a repository,
+translation units can be listed straight from a compilation database, and paths can be read
+from a list as it is being written.
+
+Files can also be found inside archives (e.g. release tarballs), in which case they are read
+straight from the archive, one at a time, without ever being extracted to disk.
+"""
+
+import os
+import re
+import sys
+import json
+import zlib
+import fnmatch
+import tarfile
+import zipfile
+import posixpath
+import subprocess
+
+from typing import List
+
+from comply.checking import supported_file_types, split_filename
+
+# the name of a file listing patterns of paths to exclude; one pattern per line
+IGNORE_FILENAME = '.complyignore'
+
+# hidden files and directories (e.g. .git) are never checked
+DEFAULT_EXCLUDED_PATTERNS = ['.*']
+
+# the number of bytes read at a time from a list of paths
+LISTING_CHUNK_SIZE = 64 * 1024
+
+# the filetypes of archives that files can be found in
+ARCHIVE_FILE_TYPES = ('.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tar.xz', '.zip')
+
+# the separator between the path of an archive and the name of a file inside it
+ARCHIVE_SEPARATOR = '!/'
+
+
+def load_excluded_patterns(path: str) -> List[str]:
+    """ Return the patterns listed in an ignore file; blank lines and lines starting with # are
+        left out.
+
+        Return an empty list if the file does not exist.
+    """
+
+    if not os.path.isfile(path):
+        return []
+
+    patterns = []
+
+    with open(path, encoding='utf-8') as file:
+        for line in file:
+            pattern = line.strip()
+
+            if len(pattern) == 0 or pattern.startswith('#'):
+                continue
+
+            patterns.append(pattern)
+
+    return patterns
+
+
+def exclusion_patterns(patterns: List[str]) -> tuple:
+    """ Return regexes matching any name or path excluded by a list of patterns, and regexes
+        matching any directory name or path excluded by the same patterns.
+
+        A pattern ending with a slash only matches directories. A pattern containing any other
+        slash matches entire paths; otherwise, it matches names only.
+    """
+
+    def compiled(patterns: List[str], is_matching_paths: bool):
+        translated = [fnmatch.translate(os.path.normcase(pattern))
+                      for pattern in patterns if ('/' in pattern) == is_matching_paths]
+
+        return re.compile('|'.join(translated)) if len(translated) > 0 else None
+
+    any_patterns = [pattern for pattern in patterns if not pattern.endswith('/')]
+
+    directory_patterns = [pattern.rstrip('/') for pattern in patterns if pattern.endswith('/')]
+
+    return (compiled(any_patterns, is_matching_paths=False),
+            compiled(any_patterns, is_matching_paths=True),
+            compiled(directory_patterns, is_matching_paths=False),
+            compiled(directory_patterns, is_matching_paths=True))
+
+
+def is_excluded(path: str, exclusion: tuple, is_directory: bool=False) -> bool:
+    """ Determine whether a path is excluded by patterns of exclusion.
+
+        A path is excluded if a pattern matches either the name of the file or directory, or its
+        entire path.
+    """
+
+    normalized_path = os.path.normcase(os.path.normpath(path))
+
+    name = os.path.basename(normalized_path)
+
+    if os.sep != '/':
+        normalized_path = normalized_path.replace(os.sep, '/')
+
+    any_name, any_path, directory_name, directory_path = exclusion
+
+    if not is_directory:
+        directory_name, directory_path = None, None
+
+    for pattern, matched in [(any_name, name), (any_path, normalized_path),
+                             (directory_name, name), (directory_path, normalized_path)]:
+        if pattern is not None and pattern.match(matched) is not None:
+            return True
+
+    return False
+
+
+def directory_exclusion(path: str, exclusion: tuple):
+    """ Return a function that determines whether a directory, given relative to path and
+        separated by forward slashes, is excluded, either by itself or by any directory
+        containing it.
+    """
+
+    # whether each directory is excluded; the root itself never is
+    excluded_directories = {'': False}
+
+    def is_directory_excluded(directory: str) -> bool:
+        if directory not in excluded_directories:
+            parent_directory = posixpath.dirname(directory)
+
+            excluded_directories[directory] = (
+                is_directory_excluded(parent_directory) or
+                is_excluded(os.path.join(path, directory), exclusion, is_directory=True))
+
+        return excluded_directories[directory]
+
+    return is_directory_excluded
+
+
+def find_checkable_files(path: str, excluded: List[str]=None):
+    """ Yield each checkable file found in a path.
+
+        If path is a directory, walk through it and any subdirectories to find checkable files,
+        leaving out any file or directory matching a pattern of exclusion. Files are yielded
+        in sorted order of their paths, and files reached through more than one path (e.g.
+        through symbolic links) are only yielded once.
+
+        If path points to a non-supported file, it is *not* excluded.
+    """
+
+    if not os.path.isdir(path):
+        # input is a plain filepath
+        yield path
+
+        return
+
+    exclusion = exclusion_patterns(DEFAULT_EXCLUDED_PATTERNS +
+                                   (excluded if excluded is not None else []))
+
+    extensions = supported_file_types()
+
+    def is_directory(entry) -> bool:
+        try:
+            return entry.is_dir()
+        except OSError:
+            return False
+
+    def scanned(directory: str) -> list:
+        """ Return each entry in a directory, sorted as if each file in a subdirectory was
+            listed in place, along with whether the entry is a directory.
+        """
+
+        try:
+            entries = [(entry, is_directory(entry)) for entry in os.scandir(directory)]
+        except OSError:
+            # the directory could not be read; treat it as being empty
+            return []
+
+        return sorted(entries, key=lambda item: item[0].name + '/' if item[1] else item[0].name)
+
+    real_path = os.path.realpath(path)
+
+    # the real path of every directory and file walked so far
+    visited = {real_path}
+
+    # the entries remaining in each directory being walked, along with its real path
+    walking = [(iter(scanned(path)), real_path)]
+
+    while len(walking) > 0:
+        entries, real_directory = walking[-1]
+
+        for entry, is_entry_directory in entries:
+            # extensions are matched case-sensitively, as by glob (e.g. .C is C++, not C)
+            if not is_entry_directory and not entry.name.endswith(extensions):
+                continue
+
+            if is_excluded(entry.path, exclusion, is_entry_directory):
+                continue
+
+            # only symbolic links need to be resolved; anything else is found where it is
+            real_path = (os.path.realpath(entry.path)
+                         if entry.is_symlink()
+                         else os.path.join(real_directory, entry.name))
+
+            if real_path in visited:
+                continue
+
+            visited.add(real_path)
+
+            if is_entry_directory:
+                # continue with this directory; the remaining entries are walked afterwards
+                walking.append((iter(scanned(entry.path)), real_path))
+
+                break
+
+            yield entry.path
+        else:
+            walking.pop()
+
+
+def tracked_files(path: str) -> List[str]:
+    """ Return each supported file tracked by the git repository that a directory belongs to,
+        relative to that directory and in sorted order.
+
+        Files that are tracked, but not present in the working tree, are left out.
+
+        Return None if the directory does not belong to a repository, or if git is not available.
+    """
+
+    # extensions are matched case-sensitively, as when walking through a directory
+    pathspecs = ['*' + extension for extension in supported_file_types()]
+
+    try:
+        listed = subprocess.run(['git', '-C', path, 'ls-files', '-z', '-t', '--cached',
+                                 '--deleted', '--'] + pathspecs,
+                                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    except OSError:
+        return None
+
+    if listed.returncode != 0:
+        return None
+
+    entries = [os.fsdecode(entry) for entry in listed.stdout.split(b'\x00') if len(entry) > 0]
+
+    # each entry is led by a tag; R is a deleted file, S is a file outside a sparse checkout
+    missing = set(entry[2:] for entry in entries if entry[0] in ['R', 'S'])
+
+    files = []
+
+    for entry in entries:
+        file = entry[2:]
+
+        if file in missing:
+            continue
+
+        # a file with conflicts is listed once for each side
+        if len(files) > 0 and files[-1] == file:
+            continue
+
+        files.append(file)
+
+    return files
+
+
+def find_tracked_files(path: str, excluded: List[str]=None):
+    """ Yield each checkable file tracked by git in a path.
+
+        Files are listed from the index of the repository rather than by walking the filesystem,
+        leaving out anything untracked, such as build outputs. Patterns of exclusion apply as
+        when walking through a directory.
+
+        If path does not belong to a repository, walk through it as usual instead; see
+        find_checkable_files().
+    """
+
+    files = tracked_files(path) if os.path.isdir(path) else None
+
+    if files is None:
+        yield from find_checkable_files(path, excluded)
+
+        return
+
+    exclusion = exclusion_patterns(DEFAULT_EXCLUDED_PATTERNS +
+                                   (excluded if excluded is not None else []))
+
+    is_directory_excluded = directory_exclusion(path, exclusion)
+
+    for file in files:
+        # paths are always listed with forward slashes
+        if is_directory_excluded(posixpath.dirname(file)):
+            continue
+
+        checkable_path = os.path.join(path, file)
+
+        if is_excluded(checkable_path, exclusion):
+            continue
+
+        yield checkable_path
+
+
+def is_archive(path: str) -> bool:
+    """ Determine whether a path points to an archive that files can be found in. """
+
+    return path.lower().endswith(ARCHIVE_FILE_TYPES)
+
+
+def archived_files(path: str):
+    """ Yield the name and data of each file stored in the archive found at path, in the order
+        they are stored.
+
+        Files are read one at a time; the archive is never read more than once, nor in its
+        entirety, even if compressed.
+    """
+
+    if path.lower().endswith('.zip'):
+        with zipfile.ZipFile(path) as archive:
+            for member in archive.infolist():
+                if not member.filename.endswith('/'):
+                    yield member.filename, archive.read(member)
+
+        return
+
+    # stream the archive; any compression is determined by the archive itself
+    with tarfile.open(path, mode='r|*') as archive:
+        for member in archive:
+            if member.isfile():
+                yield member.name, archive.extractfile(member).read()
+
+
+def find_archived_files(path: str, excluded: List[str]=None):
+    """ Yield the path and data of each checkable file found in the archive found at path.
+
+        Files are found in the order they are stored in the archive, and are given paths like
+        archive.tar!/directory/file.c. Patterns of exclusion apply as when walking through a
+        directory.
+
+        Raise a ValueError if the archive could not be read.
+    """
+
+    exclusion = exclusion_patterns(DEFAULT_EXCLUDED_PATTERNS +
+                                   (excluded if excluded is not None else []))
+
+    extensions = supported_file_types()
+
+    is_directory_excluded = directory_exclusion(path + ARCHIVE_SEPARATOR, exclusion)
+
+    try:
+        for name, data in archived_files(path):
+            # names may be stored with leading or redundant separators (e.g. ./file.c)
+            name = posixpath.normpath(name).lstrip('/')
+
+            if not name.lower().endswith(extensions):
+                continue
+
+            if is_directory_excluded(posixpath.dirname(name)):
+                continue
+
+            archived_path = path + ARCHIVE_SEPARATOR + name
+
+            if is_excluded(archived_path, exclusion):
+                continue
+
+            yield archived_path, data
+    except (tarfile.TarError, zipfile.BadZipFile, EOFError, zlib.error, RuntimeError) as error:
+        raise ValueError('\'{0}\' could not be read; {1}'.format(path, error))
+
+
+def load_compilation_database(path: str) -> List[str]:
+    """ Return the path of each translation unit listed in a compilation database (e.g. a
+        compile_commands.json file), in sorted order.
+
+        A translation unit compiled more than once (e.g. with different flags) is only listed
+        once. Raise a ValueError if the database is not valid.
+    """
+
+    with open(path, encoding='utf-8') as file:
+        try:
+            entries = json.load(file)
+        except ValueError as error:
+            raise ValueError('\'{0}\' is not valid JSON; {1}'.format(path, error))
+
+    if not isinstance(entries, list):
+        raise ValueError('\'{0}\' does not list any commands'.format(path))
+
+    translation_units = set()
+
+    for entry in entries:
+        try:
+            # the file is relative to the directory that the command was run from
+            translation_unit = os.path.join(entry['directory'], entry['file'])
+        except (KeyError, TypeError):
+            raise ValueError('\'{0}\' lists a command without a directory or file'.format(path))
+
+        translation_units.add(os.path.normpath(translation_unit))
+
+    return sorted(translation_units)
+
+
+def compiled_files_finder(database_path: str, translation_units: List[str], find_files):
+    """ Return a function that finds checkable files, given a path and patterns of exclusion,
+        for inputs to be checked along with a compilation database.
+
+        The path of the database itself is found to hold every supported translation unit
+        listed in it. Any other path is found to hold only the headers found in it by
+        find_files.
+    """
+
+    extensions = supported_file_types()
+
+    def find_compiled_files(path: str, excluded: List[str]=None):
+        if path != database_path:
+            for checkable_path in find_files(path, excluded):
+                if checkable_path == path or split_filename(checkable_path)[1] == '.h':
+                    yield checkable_path
+
+            return
+
+        exclusion = exclusion_patterns(excluded if excluded is not None else [])
+
+        for translation_unit in translation_units:
+            # a database may list sources of any language; only supported ones are checked
+            if not translation_unit.lower().endswith(extensions):
+                continue
+
+            if is_excluded(translation_unit, exclusion):
+                continue
+
+            yield translation_unit
+
+    return find_compiled_files
+
+
+def read_listed_paths(stream):
+    """ Yield each path listed in a binary stream, as soon as it has been read.
+
+        Paths are delimited by either NUL characters (e.g. as printed by `find -print0`) or
+        linebreaks; whichever is found first decides for the entire stream. Empty paths are
+        left out.
+    """
+
+    delimiter = None
+
+    pending = b''
+
+    while True:
+        # take whatever is available, rather than waiting for an entire chunk to be read
+        chunk = (stream.read1(LISTING_CHUNK_SIZE)
+                 if hasattr(stream, 'read1')
+                 else stream.read(LISTING_CHUNK_SIZE))
+
+        pending += chunk
+
+        if delimiter is None:
+            if b'\x00' in pending:
+                delimiter = b'\x00'
+            elif b'\n' in pending:
+                delimiter = b'\n'
+
+        if delimiter is not None:
+            *listed, pending = pending.split(delimiter)
+        else:
+            listed = []
+
+        if len(chunk) == 0:
+            # the stream has ended; anything left is the final path
+            listed.append(pending)
+
+        for path in listed:
+            if delimiter != b'\x00':
+                # paths may be listed with Windows-style linebreaks
+                path = path.rstrip(b'\r')
+
+            if len(path) > 0:
+                yield os.fsdecode(path)
+
+        if len(chunk) == 0:
+            break
+
+
+def find_listed_paths(path: str):
+    """ Yield each path listed in the file found at path, or in standard input if path is -.
+
+        See read_listed_paths().
+    """
+
+    if path == '-':
+        yield from read_listed_paths(sys.stdin.buffer)
+
+        return
+
+    with open(path, 'rb') as file:
+        yield from read_listed_paths(file)
@@ -0,0 +1,348 @@
+# coding=utf-8
+
+"""
+Provides functions for distributing checks to workers over TCP.
+
+A coordinator hands out units of work to any number of connected workers; each worker takes
+another unit as soon as it is done with the previous one, so idle workers always take on the
+remaining work. Workers can run on any host able to connect to the coordinator.
+
+Messages are passed back and forth as lines of JSON.
+"""
+
+import json
+import time
+import queue
+import socket
+import threading
+
+from typing import List, Tuple
+
+from comply.version import __version__
+from comply.checking import examine, examine_batch
+from comply.scheduling import start_worker, run_in_worker
+
+# the tasks that can be run by a worker; anything else is refused
+TASKS = {task.__name__: task for task in [examine, examine_batch]}
+
+# the number of seconds a worker keeps trying to connect to a coordinator before giving up
+CONNECTING_TIMEOUT = 10
+# the number of seconds a coordinator waits for each worker to be told to stop
+DISCONNECTING_TIMEOUT = 1
+# the number of seconds a coordinator waits for another worker once every worker has left,
+# before giving up on any tasks that were not completed
+ABANDONED_TIMEOUT = 10
+
+
+def parse_address(address: str) -> Tuple[str, int]:
+    """ Return a host and port from an address formatted as host:port.
+
+        Raise a ValueError if the address is not valid.
+    """
+
+    host, separator, port = address.rpartition(':')
+
+    if len(separator) == 0 or len(host) == 0:
+        raise ValueError('Address \'{0}\' not valid; must be host:port'.format(address))
+
+    return host, int(port)
+
+
+def send(stream, message: dict):
+    """ Send a message through a stream. """
+
+    stream.write(json.dumps(message) + '\n')
+    stream.flush()
+
+
+def receive(stream) -> dict:
+    """ Return the next message received through a stream.
+
+        Return None if the stream has ended.
+    """
+
+    line = stream.readline()
+
+    if len(line) == 0:
+        return None
+
+    return json.loads(line)
+
+
+def encoded(result):
+    """ Return a result where any serialized violations are marked as such.
+
+        JSON turns tuples into lists, making serialized violations indistinguishable from lists
+        of violations; marking them keeps them apart.
+    """
+
+    if isinstance(result, tuple):
+        return {'violation': list(result)}
+
+    if isinstance(result, list):
+        return [encoded(item) for item in result]
+
+    return result
+
+
+def decoded(result):
+    """ Return a result where any marked violations are turned back into serialized violations. """
+
+    if isinstance(result, dict) and 'violation' in result:
+        return tuple(result['violation'])
+
+    if isinstance(result, list):
+        return [decoded(item) for item in result]
+
+    return result
+
+
+def run_worker(address: Tuple[str, int]) -> bool:
+    """ Connect to a coordinator and run tasks, one at a time, until told to stop.
+
+        Return True if every task was handed out, False if the coordinator could not be reached
+        or runs a different version.
+    """
+
+    time_started = time.monotonic()
+
+    while True:
+        try:
+            connection = socket.create_connection(address)
+
+            break
+        except OSError:
+            # the coordinator might not have started yet
+            if time.monotonic() - time_started > CONNECTING_TIMEOUT:
+                return False
+
+            time.sleep(0.1)
+
+    with connection, connection.makefile('rw', encoding='utf-8', newline='\n') as stream:
+        hello = receive(stream)
+
+        if hello is None or hello.get('version') != __version__:
+            return False
+
+        start_worker(hello['rules'], hello['profiling'])
+
+        while True:
+            message = receive(stream)
+
+            if message is None:
+                return False
+
+            if message.get('done', False):
+                return True
+
+            try:
+                result, time_taken, time_spent = run_in_worker(TASKS[message['task']],
+                                                               tuple(message['arguments']))
+
+                reply = {'result': encoded(result),
+                         'time_taken': time_taken,
+                         'time_spent': time_spent}
+            except Exception as failure:
+                reply = {'error': '{0}: {1}'.format(type(failure).__name__, failure)}
+
+            send(stream, reply)
+
+
+class Abandoned(Exception):
+    """ Raised when a task can not be completed, as every worker has left. """
+
+
+class Coordinator:
+    """ Represents a coordinator handing out tasks to any number of workers connected over TCP.
+
+        A coordinator can be used in place of a pool of worker processes; note that only tasks
+        listed in TASKS can be run, and that any arguments must be representable as JSON.
+
+        Workers can connect, and leave, at any time. Once every worker has left, any task that
+        is not taken on by another worker in time fails with Abandoned.
+    """
+
+    def __init__(self, address: Tuple[str, int], names: List[str], is_profiling: bool):
+        self.hello = {'version': __version__,
+                      'rules': names,
+                      'profiling': is_profiling}
+
+        self.tasks = queue.Queue()
+
+        # the threads serving each connected worker
+        self.serving = []
+
+        # the number of workers connected, and whether every worker has left for good
+        self.num_workers = 0
+        self.is_abandoned = False
+
+        # guards the number of workers connected
+        self.connecting = threading.Lock()
+
+        self.listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.listener.bind(address)
+        self.listener.listen()
+
+        # the port is picked by the system if 0
+        self.address = self.listener.getsockname()
+
+        threading.Thread(target=self.accept, daemon=True).start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.terminate()
+
+    def apply_async(self, func, args: tuple=(), callback=None, error_callback=None):
+        """ Hand out a task to the first available worker.
+
+            The function must be run_in_worker; calls back with its result when completed, or
+            with an exception if failed, or abandoned.
+        """
+
+        if func != run_in_worker:
+            raise ValueError('Only tasks run by run_in_worker can be handed out')
+
+        task, arguments = args
+
+        if task.__name__ not in TASKS:
+            raise ValueError('Task \'{0}\' can not be handed out'.format(task.__name__))
+
+        with self.connecting:
+            if not self.is_abandoned:
+                self.tasks.put((task.__name__, arguments, callback, error_callback))
+
+                return
+
+        error_callback(Abandoned('every worker has left'))
+
+    def terminate(self):
+        """ Tell every worker to stop and stop accepting new workers; any tasks not yet handed
+            out are dropped.
+        """
+
+        while True:
+            try:
+                self.tasks.get_nowait()
+            except queue.Empty:
+                break
+
+        # a worker passes this on to the next before stopping
+        self.tasks.put(None)
+
+        self.listener.close()
+
+        for thread in self.serving:
+            thread.join(DISCONNECTING_TIMEOUT)
+
+    def accept(self):
+        """ Accept workers until terminated. """
+
+        while True:
+            try:
+                connection, _ = self.listener.accept()
+            except OSError:
+                # the listener was closed
+                break
+
+            thread = threading.Thread(target=self.serve, args=(connection,), daemon=True)
+            thread.start()
+
+            self.serving.append(thread)
+
+    def serve(self, connection):
+        """ Hand out tasks to a connected worker, one at a time, until terminated. """
+
+        with self.connecting:
+            self.num_workers += 1
+
+        try:
+            self.serve_connected(connection)
+        finally:
+            with self.connecting:
+                self.num_workers -= 1
+
+                is_abandoned = self.num_workers == 0
+
+            if is_abandoned:
+                # give any other worker a chance to connect before giving up
+                timer = threading.Timer(ABANDONED_TIMEOUT, self.abandon)
+                timer.daemon = True
+                timer.start()
+
+    def abandon(self):
+        """ Fail every task not yet handed out, unless a worker has connected since the last
+            worker left.
+        """
+
+        abandoned = []
+
+        with self.connecting:
+            if self.num_workers > 0:
+                return
+
+            self.is_abandoned = True
+
+            while True:
+                try:
+                    abandoned.append(self.tasks.get_nowait())
+                except queue.Empty:
+                    break
+
+        for task in abandoned:
+            if task is None:
+                # terminated; nothing was abandoned
+                self.tasks.put(None)
+
+                continue
+
+            name, arguments, callback, error_callback = task
+
+            error_callback(Abandoned('every worker has left'))
+
+    def serve_connected(self, connection):
+        """ Hand out tasks to a worker through its connection, one at a time, until
+            terminated or disconnected.
+        """
+
+        with connection, connection.makefile('rw', encoding='utf-8', newline='\n') as stream:
+            try:
+                send(stream, self.hello)
+            except OSError:
+                return
+
+            while True:
+                task = self.tasks.get()
+
+                if task is None:
+                    # make sure every other worker is also told to stop
+                    self.tasks.put(None)
+
+                    try:
+                        send(stream, {'done': True})
+                    except OSError:
+                        pass
+
+                    break
+
+                name, arguments, callback, error_callback = task
+
+                try:
+                    send(stream, {'task': name, 'arguments': arguments})
+
+                    reply = receive(stream)
+                except (OSError, ValueError):
+                    reply = None
+
+                if reply is None:
+                    # the worker is gone; let another worker take on its task
+                    self.tasks.put(task)
+
+                    break
+
+                if 'error' in reply:
+                    error_callback(RuntimeError(reply['error']))
+                else:
+                    callback((decoded(reply['result']), reply['time_taken'], reply['time_spent']))
@@ -0,0 +1,130 @@
+# coding=utf-8
+
+"""
+Provides functions for splitting checks into shards, and merging the results of each shard.
+
+Each shard checks its own share of the discovered files and saves its results to a file. Merging
+these files reports every result in order of discovery, exactly as if every file had been checked
+in a single run.
+"""
+
+import os
+import json
+import hashlib
+
+from typing import List, Tuple
+
+from comply.version import __version__
+from comply.reporting import Reporter
+from comply.rules.rule import Rule, RuleViolation
+from comply.rules.report import CheckResult
+from comply.checking import report_examined
+
+
+def shard_of(path: str, num_shards: int) -> int:
+    """ Return the shard (from 1 to num_shards) that a path belongs to.
+
+        The shard is determined by a stable hash of the path; a path always belongs to the same
+        shard, no matter which machine it is checked on.
+    """
+
+    normalized_path = os.path.normpath(path).replace(os.sep, '/')
+
+    digest = hashlib.sha1(normalized_path.encode('utf-8')).hexdigest()
+
+    return int(digest, 16) % num_shards + 1
+
+
+def save_results(path: str, shard: Tuple[int, int], rules: List[Rule], results: list):
+    """ Save the results of a shard to a file.
+
+        Each result is the index of a discovered path (in order of discovery across all shards),
+        the path, a code to determine whether the file was checked or not, the encoding used to
+        read the file and any violations collected.
+    """
+
+    document = {
+        'version': __version__,
+        'shard': list(shard),
+        'rules': [rule.name for rule in rules],
+        'results': [[index, checked_path, checked, encoding,
+                     [violation.serialized() for violation in violations]]
+                    for index, checked_path, checked, encoding, violations in results]
+    }
+
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(document, file)
+
+
+def load_results(paths: List[str]) -> (List[str], list):
+    """ Return the names of the rules checked, and the results of every shard, in order of
+        discovery.
+
+        Raise a ValueError if the results can not be merged.
+    """
+
+    names = None
+    num_shards = None
+
+    shards = []
+    results = []
+
+    for path in paths:
+        with open(path, encoding='utf-8') as file:
+            document = json.load(file)
+
+        if document.get('version') != __version__:
+            raise ValueError('Results in \'{0}\' were saved by a different version'.format(path))
+
+        if names is None:
+            names = document['rules']
+        elif names != document['rules']:
+            raise ValueError('Results in \'{0}\' were checked by different rules'.format(path))
+
+        shard, n = document['shard']
+
+        if num_shards is None:
+            num_shards = n
+        elif num_shards != n:
+            raise ValueError('Results in \'{0}\' were split into a different number of shards'
+                             .format(path))
+
+        if shard in shards:
+            raise ValueError('Shard {0}/{1} was included more than once'.format(shard, n))
+
+        shards.append(shard)
+
+        results.extend(document['results'])
+
+    for shard in range(1, num_shards + 1):
+        if shard not in shards:
+            raise ValueError('Shard {0}/{1} is missing'.format(shard, num_shards))
+
+    results.sort(key=lambda result: result[0])
+
+    return names, results
+
+
+def check_merged(results: list, rules: List[Rule], reporter: Reporter):
+    """ Report merged results exactly as if every file had been checked in a single run.
+
+        Yield a path, result and code for each merged result, stopping once the reporting limit
+        has been reached.
+    """
+
+    rules_by_name = {rule.name: rule for rule in rules}
+
+    # every discovered file counts toward the total; directories without any files, and files
+    # that were left out, do not
+    reporter.files_total += len([checked for index, path, checked, encoding, violations
+                                 in results if checked not in [CheckResult.NO_FILES_FOUND,
+                                                               CheckResult.FILE_GENERATED]])
+
+    for index, path, checked, encoding, violations in results:
+        violations = [RuleViolation.deserialized(violation, rules_by_name)
+                      for violation in violations]
+
+        yield path, report_examined(path, checked, encoding, violations, rules, reporter)
+
+        if reporter.has_reached_reporting_limit:
+            break
@@ -6,6 +6,7 @@ Provides the base-class for reporting implementations.
 
 import os
 import math
+import threading
 
 from typing import List
 
@@ -34,6 +35,48 @@ class Reporter:
         self.files_total = 0
         self.files_encountered = 0
 
+        # guards counters; files may be checked from several threads at once
+        self.counting = threading.Lock()
+
+    def count_encountered_file(self):
+        """ Count a file as encountered. """
+
+        with self.counting:
+            self.files_encountered += 1
+
+    def count_discovered_file(self):
+        """ Count a file toward the total. """
+
+        with self.counting:
+            self.files_total += 1
+
+    def count_left_out_file(self):
+        """ Stop counting a file toward the total, as it was left out after being discovered. """
+
+        with self.counting:
+            self.files_total -= 1
+
+    def count_reports(self, count: int) -> int:
+        """ Count a number of reports toward the limit of reports.
+
+            Return the number of reports exceeding the limit; these should not be reported.
+        """
+
+        if self.limit is None:
+            return 0
+
+        with self.counting:
+            self.reports += count
+
+            if self.reports > self.limit:
+                num_exceeding_reports = self.reports - self.limit
+
+                self.reports = self.limit
+
+                return num_exceeding_reports
+
+        return 0
+
     def report_before_checking(self, path: str, encoding: str=None, show_progress: bool=True):
         """ Print a diagnostic before initiating a check on a given file. """
 
@@ -115,7 +158,16 @@ class Reporter:
         return emitted
 
     def report(self, violations: List[RuleViolation], path: str):
-        """ Print a report of collected violations for a given file. """
+        """ Print a report of collected violations for a given file, if any were collected. """
+
+        if len(violations) == 0:
+            # nothing to report; most files are clean, so don't bother formatting anything
+            return
+
+        self.report_violations(violations, path)
+
+    def report_violations(self, violations: List[RuleViolation], path: str):
+        """ Print a report of one or more collected violations for a given file. """
 
         results = ['{0}: {1}'.format(path, violation) for violation in violations]
 
@@ -5,6 +5,7 @@ Provides an implementation of a reporting mode for human readers.
 """
 
 import os
+import copy
 
 from comply.rules.rule import RuleViolation
 
@@ -16,7 +17,7 @@ from comply.printing import printout, Colors
 class HumanReporter(Reporter):
     """ Provides reporting output (including suggestions) formatted for human readers. """
 
-    def report(self, violations: list, path: str):
+    def report_violations(self, violations: list, path: str):
         # determine absolute path of file
         absolute_path = os.path.abspath(path)
 
@@ -43,6 +44,11 @@ class HumanReporter(Reporter):
         """ Return a formatted result of a rule violation. """
 
         rule = violation.which
+
+        # augment a copy; the violation may still be needed after being reported (e.g. to be saved)
+        violation = copy.copy(violation)
+        violation.lines = list(violation.lines)
+
         rule.augment(violation)
 
         location = Colors.DARK + '{0}:'.format(path) + Colors.RESET
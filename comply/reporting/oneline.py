@@ -25,7 +25,7 @@ class OneLineReporter(Reporter):
     def format_message(self, reason: str, rule: Rule) -> str:
         return '{0} [{1}]'.format(reason, rule.name)
 
-    def report(self, violations: list, path: str):
+    def report_violations(self, violations: list, path: str):
         """ Looks like:
 
             /nethack/src/vision.c:1:81: warning: Line is too long (118 > 80) [line-too-long]
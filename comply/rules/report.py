@@ -4,6 +4,8 @@
 Models for dealing with checked files and their results.
 """
 
+import bisect
+
 from typing import List, Tuple
 
 
@@ -16,24 +18,40 @@ class CheckResult:
     FILE_NOT_SUPPORTED = -2
     FILE_NOT_READ = -3
     NO_FILES_FOUND = -4
+    FILE_TIMED_OUT = -5
+    FILE_GENERATED = -6
+    # a file sharing its content with a file checked earlier; only used while checking, as the
+    # file is then reported with the violations of the earlier file
+    FILE_DUPLICATE = -7
+    # a file that has not changed since it was checked by an earlier run; only used while
+    # checking, as the file is then reported with the violations found by that run
+    FILE_CACHED = -8
 
     def __init__(self,
                  violations: list=list(),
                  num_files: int=0,
                  num_files_with_violations: int=0,
                  num_violations: int=0,
-                 num_severe_violations: int=0):
+                 num_severe_violations: int=0,
+                 encoding: str=None,
+                 num_files_generated: int=0):
         self.violations = violations
         self.num_files = num_files
         self.num_files_with_violations = num_files_with_violations
         self.num_violations = num_violations
         self.num_severe_violations = num_severe_violations
+        # the number of files left out for appearing to be generated; these are not counted
+        # as files
+        self.num_files_generated = num_files_generated
+        # the encoding used to read the checked file; only set for the result of a single file
+        self.encoding = encoding
 
     def __iadd__(self, other: 'CheckResult'):
         self.num_files += other.num_files
         self.num_files_with_violations += other.num_files_with_violations
         self.num_violations += other.num_violations
         self.num_severe_violations += other.num_severe_violations
+        self.num_files_generated += other.num_files_generated
 
         return self
 
@@ -45,15 +63,25 @@ class CheckFile:
                  original: str,
                  stripped: str,
                  filename: str,
-                 extension: str):
+                 extension: str,
+                 data: bytes=None):
         self.original = original
-        self.stripped = stripped
         self.filename = filename
         self.extension = extension
 
+        # the raw bytes that the original text was decoded from; not always available (e.g.
+        # when checked by another process, or when only a chunk of the file is checked)
+        self.data = data
+
+        # stripped text is only prepared when needed, if not provided
+        self._stripped = stripped
         self._stripped_collaped = None
         self._original_lines = None
 
+        # the changes found by an earlier preparation of the same text, if any; see restore()
+        self._stripped_changes = None
+        self._collapsed_changes = None
+
     def line_number_at(self, character_index: int, span_entire_line: bool=False) -> (int, int):
         """ Return the line number and column at which a character index occur. """
 
@@ -147,6 +175,40 @@ class CheckFile:
 
         return line_index + 1, 0 if span_entire_line else 1
 
+    @property
+    def stripped(self):
+        """ Return original text with any literals and comments stripped.
+
+            Note that this is a lazy-loading property.
+
+            The text is only processed once and subsequently cached and returned immediately on
+            future calls. Rules that never look at stripped text (e.g. rules only counting
+            characters or lines) never cause the text to be stripped at all.
+        """
+
+        if self._stripped is None and self._stripped_changes is not None:
+            from comply.util.stripping import restored
+
+            self._stripped = restored(self.original, self._stripped_changes)
+
+            if self._stripped is None:
+                # the changes do not fit; the text is stripped as usual
+                self._stripped_changes = None
+                self._collapsed_changes = None
+
+        if self._stripped is None:
+            from comply.util.stripping import strip_any_comments, strip_any_literals
+
+            # remove comments and string literals to reduce chance of false-positives
+            # for stuff that isn't actually code
+            # start by stripping single-line literals; this will help stripping comments, as
+            # comment-starting characters could easily be found inside literals
+            stripped = strip_any_literals(self.original)
+            # finally strip both block and line-comments
+            self._stripped = strip_any_comments(stripped)
+
+        return self._stripped
+
     @property
     def collapsed(self):
         """ Return stripped text with collapsed function bodies.
@@ -157,9 +219,109 @@ class CheckFile:
             future calls.
         """
 
+        if self._stripped_collaped is None:
+            stripped = self.stripped
+
+            if self._collapsed_changes is not None:
+                from comply.util.stripping import restored
+
+                self._stripped_collaped = restored(stripped, self._collapsed_changes)
+
+                if self._stripped_collaped is None:
+                    self._collapsed_changes = None
+
         if self._stripped_collaped is None:
             from comply.util.stripping import strip_function_bodies
 
             self._stripped_collaped = strip_function_bodies(self.stripped)
 
         return self._stripped_collaped
+
+    def restore(self, changes: list):
+        """ Restore stripped and collapsed text from the changes found by an earlier preparation of
+            the same text (see prepared_changes()), rather than stripping it again.
+
+            Text is only restored once needed, just as it would otherwise be stripped.
+        """
+
+        self._stripped_changes, self._collapsed_changes = changes
+
+    def prepared_changes(self) -> list:
+        """ Return the changes made to the original text by stripping it, and to the stripped
+            text by collapsing it, or None for either if not prepared.
+        """
+
+        from comply.util.stripping import changes_between
+
+        stripped_changes = self._stripped_changes
+        collapsed_changes = self._collapsed_changes
+
+        if stripped_changes is None and self._stripped is not None:
+            stripped_changes = changes_between(self.original, self._stripped)
+
+        if (collapsed_changes is None and stripped_changes is not None and
+                self._stripped_collaped is not None):
+            collapsed_changes = changes_between(self._stripped, self._stripped_collaped)
+
+        return [stripped_changes, collapsed_changes]
+
+
+class CheckBatch:
+    """ Represents a batch of prepared files, joined into a single text.
+
+        The text of a batch can be searched in one pass, instead of searching each file
+        one at a time. Files are joined by a separator, which a pattern can look for to find
+        the beginning or end of a file.
+    """
+
+    SEPARATOR = '\x00'
+
+    def __init__(self, files: List[CheckFile]):
+        self.files = files
+
+        # the character index at which each file begins in the joined text
+        self.offsets = []
+
+        offset = 0
+
+        for file in files:
+            self.offsets.append(offset)
+
+            offset += len(file.original) + len(CheckBatch.SEPARATOR)
+
+        self.text = CheckBatch.SEPARATOR.join([file.original for file in files])
+
+    def index_of_file_at(self, character_index: int) -> int:
+        """ Return the index of the file in which a character index of the joined text occur. """
+
+        return bisect.bisect_right(self.offsets, character_index) - 1
+
+    def indices_of_files_matching(self, pattern) -> List[int]:
+        """ Return the indices of files that could contain a match of a pattern.
+
+            Note that a match is not guaranteed, as matches may span across files; however, no
+            file containing a match is ever left out.
+        """
+
+        indices = []
+
+        starting_index = 0
+
+        while True:
+            match = pattern.search(self.text, starting_index)
+
+            if match is None:
+                break
+
+            file_index = self.index_of_file_at(match.start())
+
+            indices.append(file_index)
+
+            if file_index + 1 >= len(self.files):
+                break
+
+            # continue from the following file; a match may extend into it, but that must
+            # not keep a match inside of it from being found
+            starting_index = self.offsets[file_index + 1]
+
+        return indices
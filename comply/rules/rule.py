@@ -4,7 +4,11 @@
 Models for defining rules and violations.
 """
 
+import sys
+import inspect
+import hashlib
 import datetime
+import threading
 import comply
 
 from typing import List, Tuple
@@ -13,6 +17,9 @@ from comply.rules.report import CheckFile
 
 from comply.printing import can_apply_colors, Colors
 
+# guards accumulation of time spent collecting; rules may collect from several threads at once
+profiling_lock = threading.Lock()
+
 
 class RuleViolation:
     """ Represents an occurence of a rule violation. """
@@ -76,6 +83,40 @@ class RuleViolation:
 
         return violating_line_index
 
+    def offset_by(self, line_count: int):
+        """ Move this violation, and its captured lines, a number of lines further into a file.
+
+            This is used for violations collected from a chunk of a file.
+        """
+
+        self.starting = (self.starting[0] + line_count, self.starting[1])
+        self.ending = (self.ending[0] + line_count, self.ending[1])
+
+        self.lines = [(line_number + line_count if line_number is not None else None, line)
+                      for (line_number, line) in self.lines]
+
+    def serialized(self) -> tuple:
+        """ Return a plain representation of this violation.
+
+            The representation refers to its rule by name only, which makes it suitable for
+            passing between processes.
+        """
+
+        return self.which.name, self.starting, self.ending, self.lines, self.meta
+
+    @staticmethod
+    def deserialized(representation: tuple, rules: dict) -> 'RuleViolation':
+        """ Return a violation from a plain representation.
+
+            The rule is looked up by name in a dict of rules. The representation may have been
+            saved as JSON, turning any tuples into lists; these are turned back into tuples.
+        """
+
+        name, starting, ending, lines, meta = representation
+
+        return RuleViolation(rules[name], tuple(starting), tuple(ending),
+                             [tuple(line) for line in lines], meta)
+
     @staticmethod
     def report_severity_as(severity: int, is_strict: bool) -> int:
         """ Return an elevated severity indicator for some severities when strict compliance
@@ -100,7 +141,6 @@ class Rule:
         self.suggestion = suggestion
 
         if comply.PROFILING_IS_ENABLED:
-            self.time_started_collecting = None
             self.total_time_spent_collecting = 0
 
     def __repr__(self):
@@ -306,6 +346,78 @@ class Rule:
 
         return RuleViolation.MANY_PER_FILE
 
+    @property
+    def is_chunkable(self) -> bool:
+        """ Determine whether violations can be collected from chunks of a file independently.
+
+            Files are only split at top-level boundaries, so a rule that only looks at individual
+            lines or functions can be collected from each chunk. A rule that needs to see the
+            file in its entirety (e.g. to count occurrences) must not be chunkable.
+        """
+
+        return False
+
+    @property
+    def screening_pattern(self):
+        """ Return a pattern found anywhere in a file that could violate this rule.
+
+            When checking files in batches, the pattern is searched for across all files at once,
+            and violations are only collected from files where it was found. A file without
+            a match must never violate the rule.
+
+            Return None to always collect violations.
+        """
+
+        return None
+
+    @property
+    def fingerprint(self) -> str:
+        """ Return a fingerprint of this rule; any change to its name, its parameters, or the
+            source of its module (or any module of comply it depends on), changes the fingerprint.
+
+            Parameters are the uppercase attributes of a rule (e.g. MAX), as currently set.
+        """
+
+        digest = hashlib.sha1(self.name.encode('utf-8') + b'\x00')
+
+        classes = [cls for cls in type(self).__mro__
+                   if cls is not Rule and issubclass(cls, Rule)]
+
+        module_names = set()
+
+        for cls in classes:
+            module = sys.modules.get(cls.__module__)
+
+            if module is None:
+                continue
+
+            module_names.add(module.__name__)
+
+            # the module may use functions, or patterns, defined by other modules
+            for value in vars(module).values():
+                module_name = getattr(value, '__module__', None)
+
+                if isinstance(module_name, str) and module_name.startswith('comply.'):
+                    module_names.add(module_name)
+
+        for module_name in sorted(module_names):
+            try:
+                with open(inspect.getsourcefile(sys.modules[module_name]), 'rb') as file:
+                    digest.update(file.read())
+            except (KeyError, OSError, TypeError):
+                # the source is not available; only the parameters can tell a change
+                digest.update(module_name.encode('utf-8'))
+
+        parameters = [vars(cls) for cls in reversed(classes)] + [vars(self)]
+
+        for attributes in parameters:
+            for name in sorted(attributes):
+                if name.isupper():
+                    digest.update('{0}={1}\n'.format(
+                        name, parameter_representation(attributes[name])).encode('utf-8'))
+
+        return digest.hexdigest()
+
     @property
     def triggering_filename(self) -> str:
         """ Return an assumed filename for a file triggering violations.
@@ -333,20 +445,27 @@ class Rule:
 
         return []
 
-    def profile_begin(self):
-        """ Mark the beginning of a violation collection. """
+    def profile_begin(self) -> datetime.datetime:
+        """ Mark the beginning of a violation collection.
+
+            Return the time at which the collection began; this must be passed on to profile_end.
+        """
 
-        self.time_started_collecting = datetime.datetime.now()
+        return datetime.datetime.now()
 
-    def profile_end(self):
+    def profile_end(self, time_started_collecting: datetime.datetime):
         """ Mark the end of a violation collection and accumulate the time taken. """
 
-        time_since_started_collecting = datetime.datetime.now() - self.time_started_collecting
+        time_since_started_collecting = datetime.datetime.now() - time_started_collecting
         time_spent_collecting = time_since_started_collecting / datetime.timedelta(seconds=1)
 
-        self.total_time_spent_collecting += time_spent_collecting
+        self.profile_accumulate(time_spent_collecting)
 
-        self.time_started_collecting = None
+    def profile_accumulate(self, time_spent_collecting: float):
+        """ Accumulate time spent collecting violations. """
+
+        with profiling_lock:
+            self.total_time_spent_collecting += time_spent_collecting
 
     @staticmethod
     def rules_in(modules: list) -> list:
@@ -372,3 +491,27 @@ class Rule:
         instances = [c() for c in classes]
 
         return instances
+
+
+def parameter_representation(value) -> str:
+    """ Return a representation of a rule parameter that is the same from one run to the next.
+
+        Unlike their repr(), sets are ordered, and patterns are never shortened.
+    """
+
+    if isinstance(value, (set, frozenset)):
+        return '{{{0}}}'.format(', '.join(sorted(parameter_representation(item)
+                                                 for item in value)))
+
+    if isinstance(value, dict):
+        return '{{{0}}}'.format(', '.join(sorted(
+            '{0}: {1}'.format(parameter_representation(key), parameter_representation(item))
+            for key, item in value.items())))
+
+    if isinstance(value, (list, tuple)):
+        return '[{0}]'.format(', '.join(parameter_representation(item) for item in value))
+
+    if hasattr(value, 'pattern') and hasattr(value, 'flags'):
+        return 're({0!r}, {1})'.format(value.pattern, value.flags)
+
+    return repr(value)
@@ -74,6 +74,10 @@ class AmbiguousFunction(Rule):
 
         return offenders
 
+    @property
+    def is_chunkable(self):
+        return True
+
     @property
     def triggers(self):
         return [
@@ -94,6 +94,10 @@ class FunctionTooLong(Rule):
     def severity(self):
         return RuleViolation.ALLOW
 
+    @property
+    def is_chunkable(self):
+        return True
+
     @property
     def triggers(self):
         return [
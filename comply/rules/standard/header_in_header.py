@@ -88,6 +88,10 @@ class HeaderInHeader(Rule):
     def severity(self):
         return RuleViolation.ALLOW
 
+    @property
+    def is_chunkable(self):
+        return True
+
     @property
     def triggering_filename(self):
         return 'header.h'
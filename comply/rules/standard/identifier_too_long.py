@@ -76,6 +76,10 @@ class IdentifierTooLong(Rule):
 
         return offenders
 
+    @property
+    def is_chunkable(self):
+        return True
+
     @property
     def triggers(self):
         return [
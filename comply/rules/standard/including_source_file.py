@@ -35,6 +35,10 @@ class IncludingSourceFile(Rule):
 
         return offenders
 
+    @property
+    def is_chunkable(self):
+        return True
+
     @property
     def triggers(self):
         return [
@@ -67,6 +67,10 @@ class InconsistentNamePlacement(Rule):
 
         return offenders
 
+    @property
+    def is_chunkable(self):
+        return True
+
     @property
     def triggers(self):
         return [
@@ -69,6 +69,10 @@ class LeftAlignedConst(Rule):
 
         return offenders
 
+    @property
+    def is_chunkable(self):
+        return True
+
     @property
     def triggers(self):
         return [
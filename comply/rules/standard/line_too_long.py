@@ -1,10 +1,23 @@
 # coding=utf-8
 
+import re
+
+from functools import lru_cache
+
 from comply.rules.rule import *
 
 from comply.printing import Colors
 
 
+@lru_cache()
+def screening_pattern_exceeding(max_characters: int):
+    """ Return a pattern found in any line longer than a number of characters. """
+
+    # any line exceeding the limit is (at least) part of a run of characters that long;
+    # note that lines are not only split on newlines
+    return re.compile(r'[^\n]{{{0},}}'.format(max_characters + 1))
+
+
 class LineTooLong(Rule):
     """ Don't exceed 80 characters per line.
 
@@ -45,6 +58,10 @@ class LineTooLong(Rule):
 
         max_characters = LineTooLong.MAX
 
+        if screening_pattern_exceeding(max_characters).search(file.original) is None:
+            # no line is long enough; don't bother going through each line
+            return offenders
+
         for i, line in enumerate(file.lines):
             length = len(line)
 
@@ -64,6 +81,14 @@ class LineTooLong(Rule):
 
         return offenders
 
+    @property
+    def is_chunkable(self):
+        return True
+
+    @property
+    def screening_pattern(self):
+        return screening_pattern_exceeding(LineTooLong.MAX)
+
     @property
     def triggers(self):
         return [
@@ -63,6 +63,10 @@ class PaddedParenthesis(Rule):
 
         return offenders
 
+    @property
+    def is_chunkable(self):
+        return True
+
     @property
     def triggers(self):
         return [
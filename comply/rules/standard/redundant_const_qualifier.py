@@ -103,6 +103,10 @@ class RedundantConstQualifier(Rule):
 
         return offenders
 
+    @property
+    def is_chunkable(self):
+        return True
+
     @property
     def triggers(self):
         return [
@@ -96,6 +96,10 @@ class RedundantParameterName(Rule):
 
         return offenders
 
+    @property
+    def is_chunkable(self):
+        return True
+
     @property
     def triggers(self):
         return [
@@ -110,6 +110,10 @@ class RedundantSizeSpecifier(Rule):
 
         return offenders
 
+    @property
+    def is_chunkable(self):
+        return True
+
     @property
     def triggers(self):
         return [
@@ -51,6 +51,10 @@ class RequireSymbols(Rule):
 
         return offenders
 
+    @property
+    def is_chunkable(self):
+        return True
+
     @property
     def triggers(self):
         return [
@@ -48,6 +48,10 @@ class ScopeTooDeep(Rule):
 
         return offenders
 
+    @property
+    def is_chunkable(self):
+        return True
+
     @property
     def triggers(self):
         return [
@@ -1,5 +1,7 @@
 # coding=utf-8
 
+import re
+
 from comply.rules.rule import *
 
 from comply.printing import Colors, supports_unicode
@@ -23,6 +25,8 @@ class TabCharacters(Rule):
 
     TAB = '\t'
 
+    SCREENING_PATTERN = re.compile(TAB)
+
     def augment_by_color(self, violation: RuleViolation):
         # assume only one offending line
         linenumber, line = violation.lines[0]
@@ -76,6 +80,10 @@ class TabCharacters(Rule):
     def collection_hint(self):
         return RuleViolation.ONCE_PER_FILE
 
+    @property
+    def screening_pattern(self):
+        return TabCharacters.SCREENING_PATTERN
+
     @property
     def triggers(self):
         return [
@@ -51,6 +51,10 @@ class Todo(Rule):
     def severity(self):
         return RuleViolation.ALLOW
 
+    @property
+    def is_chunkable(self):
+        return True
+
     @property
     def triggers(self):
         return [
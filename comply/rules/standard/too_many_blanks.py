@@ -1,6 +1,9 @@
 # coding=utf-8
 
+import re
+
 from comply.rules.rule import *
+from comply.rules.report import CheckBatch
 
 from comply.printing import Colors
 
@@ -19,6 +22,19 @@ class TooManyBlanks(Rule):
 
     MAX = 1
 
+    # any character that ends a line (a carriage return followed by a newline counts as one)
+    LINEBREAK = r'(?:\r\n|\r(?!\n)|[\n\x0b\x0c\x1c-\x1e\x85\u2028\u2029])'
+    # any whitespace that does not end a line
+    SPACE = r'[^\S\r\n\x0b\x0c\x1c-\x1e\x85\u2028\u2029]'
+
+    # two or more consecutive blank lines (enough to exceed any MAX of at least 1) always span
+    # at least two linebreaks with nothing but whitespace in between; except when the file is
+    # blank, where one linebreak is enough
+    SCREENING_PATTERN = re.compile(
+        '{linebreak}{space}*{linebreak}|'
+        '(?<![^{separator}]){space}*{linebreak}{space}*(?![^{separator}])'.format(
+            linebreak=LINEBREAK, space=SPACE, separator=re.escape(CheckBatch.SEPARATOR)))
+
     def augment_by_color(self, violation: RuleViolation):
         for i, (linenumber, line) in enumerate(violation.lines):
             if i != len(violation.lines) - 1:
@@ -30,6 +46,12 @@ class TooManyBlanks(Rule):
     def collect(self, file: CheckFile):
         offenders = []
 
+        screening_pattern = self.screening_pattern
+
+        if screening_pattern is not None and screening_pattern.search(file.original) is None:
+            # no consecutive blank lines; don't bother going through each line
+            return offenders
+
         max_lines = TooManyBlanks.MAX
 
         lines = file.lines  # without newlines
@@ -76,6 +98,14 @@ class TooManyBlanks(Rule):
 
         return offenders
 
+    @property
+    def screening_pattern(self):
+        if TooManyBlanks.MAX < 1:
+            # a single blank line is already too many; any file could violate this rule
+            return None
+
+        return TooManyBlanks.SCREENING_PATTERN
+
     @property
     def triggers(self):
         return [
@@ -82,6 +82,10 @@ class UnnamedIntegerParameter(Rule):
     def severity(self):
         return RuleViolation.ALLOW
 
+    @property
+    def is_chunkable(self):
+        return True
+
     @property
     def triggers(self):
         return [
@@ -0,0 +1,1448 @@
+# coding=utf-8
+
+"""
+Provides functions for scheduling checks through a pipeline of stages.
+
+Files are discovered, read, checked and finally reported in separate stages, each stage
+running concurrently with the others. Checks can be distributed across several processes.
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import queue
+import hashlib
+import datetime
+import threading
+import itertools
+import contextlib
+import collections
+import multiprocessing
+
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import comply
+import comply.rules
+
+from typing import List
+
+from comply.reporting import Reporter
+from comply.rules.rule import Rule, RuleViolation
+from comply.rules.report import CheckFile, CheckResult
+from comply.checking import (
+    load, check_loaded, examine, examine_batch, report_examined,
+    split_filename, prepare, split, collect, is_generated
+)
+from comply.caching import ResultCache
+
+# the number of discovered paths that can be waiting to be read
+DISCOVERY_BUFFER_SIZE = 256
+# the number of threads used for reading files
+READING_JOBS = 4
+# the number of files that can be read (or being read) while waiting to be checked
+READING_AHEAD = 32
+# the number of work units (per process) that can be waiting to be checked
+CHECKING_AHEAD = 4
+
+# the number of characters a file must not exceed to be checked in a batch with other small files
+BATCHING_THRESHOLD = 8192
+# the maximum number of files in each batch
+FILES_PER_BATCH = 16
+
+# the number of lines a file must exceed before being split and checked in chunks
+CHUNKING_THRESHOLD = 10000
+# the minimum number of lines in each chunk
+LINES_PER_CHUNK = 2000
+
+# checks are run in parallel on worker processes; violations are passed back to the main process
+PROCESS_BACKEND = 'process'
+# checks are run in parallel on threads in the main process; this only scales if the GIL is disabled
+THREAD_BACKEND = 'thread'
+
+# the number of tasks a worker process completes before being replaced
+TASKS_PER_WORKER = 500
+# the number of bytes of memory a worker process can use before being replaced
+MEMORY_PER_WORKER = 1024 * 1024 * 1024
+# the number of seconds between each time a supervised worker is checked on
+SUPERVISION_INTERVAL = 0.1
+
+# the time taken to check each file is recorded here when profiling; keyed by absolute path
+TIMINGS_FILENAME = '.comply-timings'
+
+# the rules used by a worker process; these are instantiated once when the worker starts
+worker_rules = None
+
+
+def available_cpu_count() -> int:
+    """ Return the number of CPUs available to this process.
+
+        Both CPU affinity and any CPU quota imposed on a container (through cgroups) is
+        taken into account.
+    """
+
+    try:
+        count = len(os.sched_getaffinity(0))
+    except AttributeError:
+        # not available on all platforms (e.g. macOS or Windows)
+        count = os.cpu_count() or 1
+
+    quota = cpu_quota()
+
+    if quota is not None:
+        count = min(count, quota)
+
+    return max(1, count)
+
+
+def cpu_quota() -> int:
+    """ Return the number of CPUs allowed by a cgroup quota.
+
+        Return None if no quota is imposed.
+    """
+
+    def read_numbers(path: str) -> list:
+        try:
+            with open(path) as file:
+                return file.read().split()
+        except (OSError, ValueError):
+            return []
+
+    # cgroup v2; looks like "max 100000" or "200000 100000"
+    numbers = read_numbers('/sys/fs/cgroup/cpu.max')
+
+    if len(numbers) == 2 and numbers[0] != 'max':
+        quota, period = numbers
+    else:
+        # cgroup v1; quota is -1 if not imposed
+        quota = read_numbers('/sys/fs/cgroup/cpu/cpu.cfs_quota_us')
+        period = read_numbers('/sys/fs/cgroup/cpu/cpu.cfs_period_us')
+
+        if len(quota) != 1 or len(period) != 1:
+            return None
+
+        quota, period = quota[0], period[0]
+
+    try:
+        quota, period = int(quota), int(period)
+    except ValueError:
+        return None
+
+    if quota <= 0 or period <= 0:
+        return None
+
+    return max(1, int(math.ceil(quota / period)))
+
+
+def default_backend() -> str:
+    """ Return the backend best suited for running checks in parallel.
+
+        Threads are preferred when running on a free-threaded build (i.e. without a GIL), as they
+        avoid the overhead of starting processes and passing results between them.
+    """
+
+    is_gil_enabled = getattr(sys, '_is_gil_enabled', None)
+
+    if is_gil_enabled is not None and not is_gil_enabled():
+        return THREAD_BACKEND
+
+    return PROCESS_BACKEND
+
+
+def start_worker(names: List[str], is_profiling: bool):
+    """ Prepare a worker process for checking files.
+
+        The rules are instantiated once and kept for the lifetime of the worker.
+    """
+
+    global worker_rules
+
+    # must be set before instantiating rules, as profiling state is set up on init
+    comply.PROFILING_IS_ENABLED = is_profiling
+
+    rules = {rule.name: rule for rule in Rule.rules_in([comply.rules.standard])}
+
+    # keep the same order as the rules of the main process;
+    # violations are collected (and reported) in this order
+    worker_rules = [rules[name] for name in names]
+
+
+def memory_usage() -> int:
+    """ Return the number of bytes of memory used by this process.
+
+        Return 0 if the memory usage can not be determined.
+    """
+
+    try:
+        # the resident set size is the second field, measured in pages
+        with open('/proc/self/statm') as file:
+            num_pages = int(file.read().split()[1])
+
+        return num_pages * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+
+    try:
+        import resource
+    except ImportError:
+        # not available on Windows
+        return 0
+
+    # note that this is the peak usage, not the current usage
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # measured in bytes on macOS, but kilobytes elsewhere
+    return usage if sys.platform == 'darwin' else usage * 1024
+
+
+def run_supervised_worker(connection, initializer, initargs: tuple):
+    """ Run tasks received from a supervisor, one at a time, until told to stop.
+
+        The outcome of each task is sent back along with the memory used by the worker.
+    """
+
+    initializer(*initargs)
+
+    while True:
+        try:
+            message = connection.recv()
+        except EOFError:
+            break
+
+        if message is None:
+            break
+
+        func, args = message
+
+        try:
+            outcome = True, func(*args)
+        except Exception as failure:
+            outcome = False, failure
+
+        connection.send(outcome + (memory_usage(),))
+
+
+def run_timed(task, arguments: tuple, rules: List[Rule]) -> tuple:
+    """ Run a task and return its result along with the number of seconds it took. """
+
+    time_started = datetime.datetime.now()
+
+    result = task(*arguments, rules)
+
+    time_taken = (datetime.datetime.now() - time_started) / datetime.timedelta(seconds=1)
+
+    return result, time_taken
+
+
+def run_in_worker(task, arguments: tuple) -> tuple:
+    """ Run a task in a worker process and return a result that can be passed back to
+        the main process.
+
+        The task is called with the provided arguments followed by the rules of the worker.
+        Any violations resulting from the task are serialized.
+    """
+
+    if comply.PROFILING_IS_ENABLED:
+        time_spent_before = [rule.total_time_spent_collecting for rule in worker_rules]
+
+    result, time_taken = run_timed(task, arguments, worker_rules)
+
+    result = serialized(result)
+
+    time_spent = None
+
+    if comply.PROFILING_IS_ENABLED:
+        time_spent = {rule.name: rule.total_time_spent_collecting - time_spent_before[i]
+                      for i, rule in enumerate(worker_rules)}
+
+    return result, time_taken, time_spent
+
+
+def serialized(result):
+    """ Return a result where any violations, also those in nested lists, are serialized. """
+
+    if isinstance(result, RuleViolation):
+        return result.serialized()
+
+    if isinstance(result, list):
+        return [serialized(item) for item in result]
+
+    return result
+
+
+def deserialized(result, rules: dict):
+    """ Return a result where any serialized violations, also those in nested lists,
+        are deserialized.
+    """
+
+    if isinstance(result, tuple):
+        return RuleViolation.deserialized(result, rules)
+
+    if isinstance(result, list):
+        return [deserialized(item, rules) for item in result]
+
+    return result
+
+
+def prepare_in_part(path: str, text: str, rules: List[Rule]) -> CheckFile:
+    """ Prepare a text read from the file found at path for checking in chunks. """
+
+    filename, extension = split_filename(path)
+
+    file = prepare(text, filename, extension, path)
+
+    # strip the file here, in the worker; otherwise it would be stripped once split into chunks,
+    # on the thread handling the results of every other file
+    file.stripped
+
+    return file
+
+
+def prepare_restored(path: str, text: str, data: bytes, digest: bytes,
+                     cache: ResultCache) -> CheckFile:
+    """ Prepare a text read from the file found at path for checking, restoring anything that was
+        prepared by an earlier run; see ResultCache.restore_prepared().
+    """
+
+    filename, extension = split_filename(path)
+
+    file = prepare(text, filename, extension, path, data)
+
+    # the file is not stripped again if it was stripped by an earlier run
+    cache.restore_prepared(digest, file)
+
+    return file
+
+
+def examine_in_part(file: CheckFile, is_chunk: bool, rules: List[Rule]) -> List[RuleViolation]:
+    """ Run a check on a part of a prepared file without reporting anything.
+
+        A chunk is only checked by chunkable rules; the entire file is only checked
+        by the remaining rules.
+    """
+
+    return collect(file, [rule for rule in rules if rule.is_chunkable == is_chunk])
+
+
+def load_timings(path: str) -> dict:
+    """ Return the time taken to check each file, as recorded by earlier runs.
+
+        Return an empty dict if nothing has been recorded.
+    """
+
+    try:
+        with open(path) as file:
+            timings = json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+    return timings if isinstance(timings, dict) else {}
+
+
+def save_timings(path: str, timings: dict):
+    """ Record the time taken to check each file for use by later runs. """
+
+    try:
+        with open(path, 'w') as file:
+            json.dump(timings, file, indent=0, sort_keys=True)
+    except OSError:
+        pass
+
+
+def estimated_costs(paths: List[str], timings: dict) -> List[float]:
+    """ Return the estimated cost of checking each file found at paths.
+
+        The cost of a file is the time it took to check it in an earlier run. For files that
+        have not been timed, the cost is estimated from their size; scaled by the time taken per
+        byte for those that have.
+    """
+
+    sizes = []
+
+    for path in paths:
+        try:
+            sizes.append(os.path.getsize(path))
+        except OSError:
+            sizes.append(0)
+
+    recorded = [timings.get(os.path.abspath(path)) for path in paths]
+
+    total_time_recorded = sum([time_taken for time_taken in recorded if time_taken is not None])
+    total_size_recorded = sum([size for size, time_taken in zip(sizes, recorded)
+                               if time_taken is not None])
+
+    seconds_per_byte = (total_time_recorded / total_size_recorded
+                        if total_time_recorded > 0 and total_size_recorded > 0
+                        else 1)
+
+    return [time_taken if time_taken is not None else size * seconds_per_byte
+            for size, time_taken in zip(sizes, recorded)]
+
+
+def buffered(items, size: int, discard=None):
+    """ Produce items on a separate thread and yield each item as it becomes available.
+
+        At most size items are produced ahead of being consumed. Items stop being produced as
+        soon as they stop being consumed; any items produced, but not consumed, are passed to
+        discard, if provided. Items are closed, if possible, once no longer produced.
+    """
+
+    buffer = queue.Queue(maxsize=size)
+
+    # marks the end of the produced items
+    end = object()
+
+    failures = []
+
+    stopping = threading.Event()
+
+    def produce():
+        try:
+            for item in items:
+                if stopping.is_set():
+                    if discard is not None:
+                        discard(item)
+
+                    break
+
+                buffer.put(item)
+        except Exception as failure:
+            failures.append(failure)
+        finally:
+            buffer.put(end)
+
+            # items are only ever produced on this thread; so they must also be closed here
+            close = getattr(items, 'close', None)
+
+            if close is not None:
+                close()
+
+    threading.Thread(target=produce, daemon=True).start()
+
+    try:
+        while True:
+            item = buffer.get()
+
+            if item is end:
+                break
+
+            yield item
+    finally:
+        stopping.set()
+
+        # make room for the producer to notice that it should stop
+        while not buffer.empty():
+            item = buffer.get_nowait()
+
+            if item is not end and discard is not None:
+                discard(item)
+
+    if len(failures) > 0:
+        raise failures[0]
+
+
+def submitted_ahead(items, submit, ahead: int):
+    """ Submit each item for processing and yield each result in the order of submission, as
+        soon as it is available.
+
+        Items are submitted on a separate thread, at most ahead items before the first pending
+        result is consumed; a result never waits for any items following it. Any pending items
+        are cancelled as soon as results stop being consumed.
+
+        The submit function must return a future for the result.
+    """
+
+    def submitting():
+        try:
+            for item in items:
+                yield submit(item)
+        finally:
+            close = getattr(items, 'close', None)
+
+            if close is not None:
+                close()
+
+    pending = buffered(submitting(), size=ahead, discard=lambda future: future.cancel())
+
+    try:
+        for future in pending:
+            yield future.result()
+    finally:
+        pending.close()
+
+
+def should_stop(result: CheckResult, reporter: Reporter, fail_fast: bool) -> bool:
+    """ Determine whether checking should stop after a result has been reported.
+
+        Checking stops once the reporting limit has been reached, or, if failing fast, once a
+        file has been found to have severe violations.
+    """
+
+    if reporter.has_reached_reporting_limit:
+        return True
+
+    return fail_fast and result.num_severe_violations > 0
+
+
+def check_in_stages(discovered, rules: List[Rule], reporter: Reporter, jobs: int=1,
+                    backend: str=PROCESS_BACKEND, timings: dict=None, longest_first: bool=False,
+                    timeout: float=None, coordinator=None, fail_fast: bool=False, load=load,
+                    cache: ResultCache=None):
+    """ Run checks on discovered files through a pipeline of stages.
+
+        Each discovered item is a path and a code; any code other than None indicates a path that
+        should not be checked, and is passed through as-is. Every other path is read by load.
+
+        If longest first, files are checked in parallel in order of their estimated cost, most
+        costly first; the cost of each file is estimated from timings recorded by earlier runs.
+        The time taken to check each file is recorded in timings, if provided.
+
+        If a timeout is set, files are always checked on supervised worker processes, and a file
+        that takes longer than the timeout to check is not checked.
+
+        If a coordinator is provided, files are always checked by the workers connected to it.
+
+        Yield a path, result and code for each discovered item, in the same order as discovered.
+        Results are reported exactly as if each file had been checked one at a time.
+
+        Once the reporting limit has been reached, no more files are discovered, read or checked,
+        and any pending work is cancelled. If failing fast, the same goes for the first file
+        found to have severe violations.
+
+        Files sharing the same name and content are only checked once; see check_distinct().
+        If a cache is provided, files checked by an earlier run are not checked again, and files
+        that have not changed since are not even read; if only some rules have changed since,
+        only those rules are checked again, without stripping any file again (see
+        ResultCache.restore_prepared()). This does not apply if longest first, as
+        a file could then be checked after any files sharing its content have already been
+        reported.
+    """
+
+    paths = buffered(discovered, size=DISCOVERY_BUFFER_SIZE)
+
+    # the index of each path in order of discovery, if paths are not checked in that order
+    order = None
+
+    if jobs > 1 and longest_first:
+        # every path must be discovered before knowing which file is the most costly
+        paths = list(paths)
+
+        costs = estimated_costs([path for path, checked in paths],
+                                timings if timings is not None else {})
+
+        # sorting is stable; files of equal cost remain in order of discovery
+        order = sorted(range(len(paths)), key=lambda index: -costs[index])
+
+        paths = [paths[index] for index in order]
+
+        cache = None
+
+    if cache is not None:
+        cache.use(rules)
+
+    def is_unchanged(path: str) -> bool:
+        """ Determine whether a discovered file has not changed since it was checked by an
+            earlier run.
+        """
+
+        if cache is None:
+            return False
+
+        digest = cache.digest_of_unchanged(path)
+
+        return digest is not None and cache.has_results(cache.result_key(digest, path))
+
+    with ThreadPoolExecutor(max_workers=READING_JOBS) as reading:
+        def read_ahead(item):
+            path, checked = item
+
+            if checked is None and is_unchanged(path):
+                # nothing to read; the file is reported with the violations of the earlier run
+                checked = CheckResult.FILE_CACHED
+
+            if checked is not None:
+                # nothing to read; the item is passed through as-is
+                passed = Future()
+                passed.set_result((path, checked, None, None, None))
+
+                return passed
+
+            return reading.submit(lambda: (path,) + load(path))
+
+        reading_ahead = submitted_ahead(paths, read_ahead, ahead=READING_AHEAD)
+
+        try:
+            yield from check_loaded_in_stages(reading_ahead, rules, reporter, jobs, backend,
+                                              timings, order, timeout, coordinator, fail_fast,
+                                              cache, load)
+        finally:
+            # stop reading any more files; this also stops discovering any more files
+            reading_ahead.close()
+
+
+def check_loaded_in_stages(loaded, rules: List[Rule], reporter: Reporter, jobs: int,
+                           backend: str, timings: dict, order: list, timeout: float,
+                           coordinator, fail_fast: bool, cache: ResultCache=None, load=load):
+    """ Run checks on loaded files, either one at a time or in parallel.
+
+        Each loaded item is a path, a code, and the text, encoding and data read from the file.
+        If an order is provided, items are loaded in that order, rather than in order of
+        discovery; a cache is then never provided. Any file that must be read again is read by
+        load.
+
+        Stop as soon as the reporting limit has been reached, or, if failing fast, as soon as
+        severe violations have been found.
+    """
+
+    is_checking_elsewhere = timeout is not None or coordinator is not None
+
+    if jobs > 1 and not is_checking_elsewhere:
+        # wait until at least two files are ready for checking before deciding whether
+        # it is worth starting up any worker processes
+        peeked = []
+
+        num_checkable = 0
+
+        for item in loaded:
+            peeked.append(item)
+
+            path, checked, text, encoding, data = item
+
+            if checked == CheckResult.FILE_CHECKED:
+                num_checkable += 1
+
+                if num_checkable > 1:
+                    break
+        else:
+            jobs = 1
+
+            if order is not None:
+                # everything has been loaded; restore the order of discovery
+                peeked = [item for index, item in sorted(zip(order, peeked))]
+
+        loaded = itertools.chain(peeked, loaded)
+
+    def check_files(loaded):
+        if jobs > 1 or is_checking_elsewhere:
+            # only the text is passed on to workers; any data is left behind
+            loaded = ((path, checked, text, encoding)
+                      for path, checked, text, encoding, data in loaded)
+
+            indexed = (zip(order, loaded) if order is not None else
+                       enumerate(loaded))
+
+            yield from check_in_parallel(indexed, rules, reporter, jobs, backend,
+                                         window=len(order) if order is not None else None,
+                                         timings=timings, timeout=timeout,
+                                         coordinator=coordinator, fail_fast=fail_fast)
+        else:
+            for path, checked, text, encoding, data in loaded:
+                if checked != CheckResult.FILE_CHECKED:
+                    yield path, (CheckResult(), checked)
+
+                    continue
+
+                time_started = datetime.datetime.now()
+
+                file = None
+
+                if cache is not None:
+                    digest = hashlib.sha1(data).digest()
+
+                    file = prepare_restored(path, text, data, digest, cache)
+
+                checked = check_loaded(path, text, encoding, rules, reporter, data, file)
+
+                if cache is not None:
+                    cache.keep_prepared(digest, file)
+
+                if timings is not None:
+                    time_taken = datetime.datetime.now() - time_started
+
+                    timings[os.path.abspath(path)] = time_taken / datetime.timedelta(seconds=1)
+
+                yield path, checked
+
+                result, checked = checked
+
+                if should_stop(result, reporter, fail_fast):
+                    break
+
+    if order is None:
+        yield from check_distinct(loaded, check_files, rules, reporter, fail_fast, cache, load)
+    else:
+        # a file could be checked after any file sharing its content has been reported
+        yield from check_files(loaded)
+
+
+def check_distinct(loaded, check_files, rules: List[Rule], reporter: Reporter,
+                   fail_fast: bool=False, cache: ResultCache=None, load=load):
+    """ Run checks on loaded files, checking each distinct file only once.
+
+        Each loaded item is a path, a code, and the text, encoding and data read from the file.
+        Files are distinct by their name and a hash of their data; e.g. copies of the same
+        header found in different directories are not distinct. Items are passed on to
+        check_files, which must yield a path, result and code for each item, in order.
+
+        Any file that is not distinct is passed on in its place, but is not checked; instead,
+        it is reported with the violations found in the first file sharing its content,
+        exactly as if it had been checked itself.
+
+        If a cache is provided, the same goes for any file that was checked by an earlier run,
+        by the same rules (see ResultCache.use()); this includes files found unchanged before
+        even being read (see ResultCache.digest_of_unchanged()). A file that was only checked by
+        some of the rules is examined by the remaining rules right away, and is then reported
+        in the same way. The violations found in every file are stored in the cache, by rule.
+        A file found unchanged whose results can not be used after all is read by load, exactly
+        as if it had been read when discovered.
+
+        Yield a path, result and code for each loaded file, in the same order as loaded.
+    """
+
+    # the key and encoding of each file passed on, and whether its violations should be kept
+    # in the cache, or None for any item that is not checked, in order
+    passed = collections.deque()
+
+    # the code, encoding and violations reported for each distinct file, once reported
+    reported = {}
+
+    # the key of each distinct file passed on, or found in the cache
+    keys = set()
+
+    # the encoding and violations found by some, but not all, rules in each file, by rule name,
+    # as found in the cache
+    incomplete = {}
+
+    def is_reported(key: tuple, path: str) -> bool:
+        """ Determine whether a file is reported with the violations of another file, or of an
+            earlier run, rather than being checked.
+        """
+
+        if key in keys:
+            return True
+
+        if cache is None or key in incomplete:
+            return False
+
+        cached = cache.load(cache.result_key(key[0], path))
+
+        if cached is None:
+            return False
+
+        encoding, found = cached
+
+        if any(rule.name not in found for rule in rules):
+            incomplete[key] = cached
+
+            return False
+
+        keys.add(key)
+
+        # violations are collected in order of rules
+        violations = [violation for rule in rules for violation in found[rule.name]]
+
+        reported[key] = (CheckResult.FILE_CHECKED, encoding, violations)
+
+        return True
+
+    def complete(key: tuple, path: str, text: str, data: bytes):
+        """ Examine a file by every rule that has not already been found in the cache to have
+            examined it, and store the result.
+        """
+
+        encoding, found = incomplete.pop(key)
+
+        remaining = [rule for rule in rules if rule.name not in found]
+
+        file = prepare_restored(path, text, data, key[0], cache)
+
+        examined = violations_by_rule(collect(file, remaining), remaining)
+
+        cache.keep_prepared(key[0], file)
+
+        cache.store(cache.result_key(key[0], path), encoding, examined)
+
+        found.update(examined)
+
+        keys.add(key)
+
+        violations = [violation for rule in rules for violation in found[rule.name]]
+
+        reported[key] = (CheckResult.FILE_CHECKED, encoding, violations)
+
+    def distinct():
+        for path, checked, text, encoding, data in loaded:
+            if checked == CheckResult.FILE_CACHED:
+                # the file has not been read, as it has not changed since an earlier run
+                key = (cache.unchanged[path],) + split_filename(path)
+
+                if not is_reported(key, path):
+                    # its result could not be used after all; the file is read as it would
+                    # have been when discovered
+                    checked, text, encoding, data = load(path)
+
+            if checked == CheckResult.FILE_CHECKED:
+                digest = hashlib.sha1(data).digest()
+
+                if cache is not None:
+                    cache.remember(path, digest)
+
+                # rules may look at the name of a file, but never its directory
+                key = (digest,) + split_filename(path)
+            elif checked != CheckResult.FILE_CACHED:
+                passed.append(None)
+
+                yield path, checked, text, encoding, data
+
+                continue
+
+            is_reused = is_reported(key, path)
+
+            if (not is_reused and key in incomplete and checked == CheckResult.FILE_CHECKED and
+                    not reporter.has_reached_reporting_limit):
+                complete(key, path, text, data)
+
+                is_reused = True
+
+            if is_reused:
+                passed.append((key, None, False))
+
+                # the file keeps its place, but is not checked
+                yield path, CheckResult.FILE_DUPLICATE, None, encoding, None
+
+                continue
+
+            keys.add(key)
+
+            # a file that appears to be generated could be left out by a later run; it is not
+            # kept, as it would then be reported rather than left out
+            is_kept = (cache is not None and checked == CheckResult.FILE_CHECKED and
+                       not is_generated(text))
+
+            passed.append((key, encoding, is_kept))
+
+            yield path, checked, text, encoding, data
+
+    for path, (result, checked) in check_files(distinct()):
+        distinction = passed.popleft()
+
+        if distinction is not None:
+            key, encoding, is_kept = distinction
+
+            if checked == CheckResult.FILE_DUPLICATE:
+                # the first file sharing its content has always been reported by now
+                checked, encoding, violations = reported[key]
+
+                result, checked = report_examined(path, checked, encoding, violations,
+                                                  rules, reporter)
+            else:
+                # a file skipped only because the reporting limit was reached was fine; any
+                # file sharing its content is then skipped for the same reason, but counted
+                reported[key] = (checked if checked != CheckResult.FILE_SKIPPED
+                                 else CheckResult.FILE_CHECKED,
+                                 encoding, result.violations)
+
+                # violations are only complete if the reporting limit has not been reached
+                if (is_kept and checked == CheckResult.FILE_CHECKED and
+                        not reporter.has_reached_reporting_limit):
+                    cache.store(cache.result_key(key[0], path), encoding,
+                                violations_by_rule(result.violations, rules))
+
+        yield path, (result, checked)
+
+        if should_stop(result, reporter, fail_fast):
+            break
+
+
+def violations_by_rule(violations: List[RuleViolation], rules: List[Rule]) -> dict:
+    """ Return the violations found by each rule, by name, including rules that found none. """
+
+    found = {rule.name: [] for rule in rules}
+
+    for violation in violations:
+        found[violation.which.name].append(violation)
+
+    return found
+
+
+@contextlib.contextmanager
+def started_workers(rules: List[Rule], jobs: int, backend: str, timeout: float=None,
+                    coordinator=None):
+    """ Start a number of workers for running tasks in parallel.
+
+        Provide a function that starts a task, calling back with its result and the number of
+        seconds it took when completed, or with an exception if failed. The task is called with
+        the provided arguments followed by the rules to check with.
+
+        If a timeout is set, tasks always run on supervised worker processes, and a task that
+        takes longer fails with TimedOut; as threads can not be stopped, the backend is ignored.
+
+        If a coordinator is provided, tasks are handed out to its workers instead; both backend
+        and timeout are ignored.
+
+        Any tasks that have not been started are dropped once the workers are no longer needed.
+    """
+
+    if backend == THREAD_BACKEND and timeout is None and coordinator is None:
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            # tasks that have not been completed yet
+            pending_tasks = set()
+
+            def run_async(task, arguments: tuple, complete, fail):
+                def done(pending):
+                    pending_tasks.discard(pending)
+
+                    if pending.cancelled():
+                        return
+
+                    failure = pending.exception()
+
+                    if failure is not None:
+                        fail(failure)
+
+                        return
+
+                    try:
+                        complete(*pending.result())
+                    except Exception as failure:
+                        fail(failure)
+
+                # rules are shared between threads; they keep no state between collections
+                pending = executor.submit(run_timed, task, arguments, rules)
+
+                pending_tasks.add(pending)
+
+                pending.add_done_callback(done)
+
+            try:
+                yield run_async
+            finally:
+                # drop any tasks that have not been started yet
+                for pending in list(pending_tasks):
+                    pending.cancel()
+    else:
+        rules_by_name = {rule.name: rule for rule in rules}
+
+        names = [rule.name for rule in rules]
+
+        initargs = (names, comply.PROFILING_IS_ENABLED)
+
+        if coordinator is not None:
+            pool = coordinator
+        elif timeout is not None:
+            pool = SupervisedPool(processes=jobs,
+                                  initializer=start_worker,
+                                  initargs=initargs,
+                                  timeout=timeout,
+                                  max_tasks=TASKS_PER_WORKER,
+                                  max_memory=MEMORY_PER_WORKER)
+        else:
+            pool = multiprocessing.Pool(processes=jobs,
+                                        initializer=start_worker,
+                                        initargs=initargs,
+                                        maxtasksperchild=TASKS_PER_WORKER)
+
+        with pool:
+            def run_async(task, arguments: tuple, complete, fail):
+                def done(result):
+                    result, time_taken, time_spent = result
+
+                    if time_spent is not None:
+                        for name, time_spent_collecting in time_spent.items():
+                            rules_by_name[name].profile_accumulate(time_spent_collecting)
+
+                    try:
+                        complete(deserialized(result, rules_by_name), time_taken)
+                    except Exception as failure:
+                        # an exception must not be raised on the thread handling results
+                        fail(failure)
+
+                pool.apply_async(run_in_worker, (task, arguments),
+                                 callback=done,
+                                 error_callback=fail)
+
+            yield run_async
+
+
+def examine_in_chunks(run_async, path: str, text: str, rules: List[Rule], jobs: int,
+                      complete, fail):
+    """ Start a check on a large text read from the file found at path, split into chunks that
+        are checked in parallel.
+
+        The file is first prepared as a whole, and then split at top-level boundaries.
+        Chunkable rules are collected from each chunk, while remaining rules are collected from
+        the entire file. Calls back with all violations, in the same order as if the file had
+        been checked in its entirety, and the total number of seconds taken by every part.
+    """
+
+    def prepared(file: CheckFile, time_taken_preparing: float):
+        num_lines = file.original.count('\n')
+
+        chunks = split(file, lines_per_chunk=max(LINES_PER_CHUNK, num_lines // jobs))
+
+        # the entire file is the first part, followed by each chunk
+        parts = [(0, file, False)] + [(line_offset, chunk, True)
+                                      for line_offset, chunk in chunks]
+
+        examined_parts = [None] * len(parts)
+
+        remaining = [len(parts)]
+        time_taken = [time_taken_preparing]
+
+        completing = threading.Lock()
+
+        def examined(part_index: int, violations: List[RuleViolation], time_taken_examining: float):
+            line_offset, _, _ = parts[part_index]
+
+            for violation in violations:
+                violation.offset_by(line_offset)
+
+            with completing:
+                if remaining[0] <= 0:
+                    # another part has failed
+                    return
+
+                examined_parts[part_index] = violations
+
+                remaining[0] -= 1
+                time_taken[0] += time_taken_examining
+
+                if remaining[0] > 0:
+                    return
+
+            # violations are collected in the order of rules; as sorting is stable, the
+            # violations of each rule remain in the order of the chunks they were found in
+            rule_order = {rule.name: i for i, rule in enumerate(rules)}
+
+            all_violations = sorted(itertools.chain(*examined_parts),
+                                    key=lambda violation: rule_order[violation.which.name])
+
+            complete(all_violations, time_taken[0])
+
+        def failed(failure):
+            with completing:
+                if remaining[0] <= 0:
+                    return
+
+                # make sure we only fail once
+                remaining[0] = 0
+
+            fail(failure)
+
+        for i, (_, part, is_chunk) in enumerate(parts):
+            run_async(examine_in_part, (part, is_chunk),
+                      complete=lambda violations, seconds, i=i: examined(i, violations, seconds),
+                      fail=failed)
+
+    run_async(prepare_in_part, (path, text), complete=prepared, fail=fail)
+
+
+def check_in_parallel(loaded, rules: List[Rule], reporter: Reporter, jobs: int,
+                      backend: str=PROCESS_BACKEND, window: int=None, timings: dict=None,
+                      timeout: float=None, coordinator=None, fail_fast: bool=False):
+    """ Run checks on loaded files using a number of workers.
+
+        Each loaded file is preceded by its index in the order that files should be reported in.
+
+        Files are checked in any order, but results pass through a reorder buffer before being
+        reported; a file is reported as soon as every file preceding it has been reported.
+        At most window files can be loaded ahead of the next file to be reported.
+
+        Small files are checked in batches, each batch being a single unit of work; this way,
+        the overhead of passing work to, and results from, a worker is shared by many files.
+
+        The time taken to check each file is recorded in timings, if provided.
+
+        If a timeout is set, a file that takes longer to check is not checked; files are not
+        batched in that case, as each file must be given the same amount of time.
+
+        If a coordinator is provided, files are checked by its workers; large files are not
+        split into chunks in that case, as only files can be handed out. Workers can connect and
+        leave at any time, so the amount of work handed out ahead follows the number of workers
+        connected, rather than the number of jobs.
+
+        Yield a path, result and code for each loaded file, in order of reporting. Stop once
+        there is no need to report any more files; see should_stop().
+    """
+
+    # results are put here as soon as a unit of work is completed; in any order
+    completed = queue.Queue()
+
+    is_window_fixed = window is not None
+
+    def num_workers() -> int:
+        """ Return the number of workers that units of work are handed out to. """
+
+        if coordinator is None:
+            return jobs
+
+        # any work handed out while no worker is connected waits for the first one to connect
+        return max(1, coordinator.num_workers)
+
+    def units_ahead() -> int:
+        """ Return the number of units of work that can be handed out at once, sizing the window
+            of results to match.
+        """
+
+        workers = num_workers()
+
+        if not is_window_fixed:
+            # leave room for batches to fill up while other units of work are being checked
+            ordered.window = workers * CHECKING_AHEAD * FILES_PER_BATCH
+
+        return workers * CHECKING_AHEAD
+
+    ordered = ReorderBuffer(window)
+
+    max_units = units_ahead()
+
+    files_per_batch = FILES_PER_BATCH if timeout is None else 1
+
+    with started_workers(rules, jobs, backend, timeout, coordinator) as run_async:
+        def submit(indexed_items: list):
+            def complete(violations_per_file: list, time_taken: float):
+                total_length = sum([len(text) for index, (path, checked, text, encoding)
+                                    in indexed_items])
+
+                # the time taken by a batch is shared by its files, in proportion to their size
+                completed.put([(index, (path, checked, encoding, violations),
+                                time_taken * (len(text) / total_length
+                                              if total_length > 0
+                                              else 1 / len(indexed_items)))
+                               for (index, (path, checked, text, encoding)), violations
+                               in zip(indexed_items, violations_per_file)])
+
+            def fail(failure):
+                if isinstance(failure, TimedOut):
+                    # the file is reported as not checked, rather than failing the entire run
+                    completed.put([(index, (path, CheckResult.FILE_TIMED_OUT, None, []), None)
+                                   for index, (path, checked, text, encoding) in indexed_items])
+                else:
+                    completed.put([(index, failure, None) for index, item in indexed_items])
+
+            if len(indexed_items) > 1:
+                run_async(examine_batch,
+                          ([(path, text) for index, (path, checked, text, encoding)
+                            in indexed_items],),
+                          complete, fail)
+
+                return
+
+            index, (path, checked, text, encoding) = indexed_items[0]
+
+            def complete_file(violations: List[RuleViolation], time_taken: float):
+                complete([violations], time_taken)
+
+            if coordinator is None and text.count('\n') > CHUNKING_THRESHOLD:
+                examine_in_chunks(run_async, path, text, rules, jobs, complete_file, fail)
+            else:
+                run_async(examine, (path, text), complete_file, fail)
+
+        # small files waiting to be submitted together
+        batch = []
+        # a loaded file waiting for a unit of work to complete before it can be submitted
+        waiting = None
+
+        num_loaded = 0
+        num_released = 0
+        num_units = 0
+
+        has_loaded_all = False
+
+        while True:
+            if coordinator is not None:
+                max_units = units_ahead()
+
+            while True:
+                if len(batch) >= files_per_batch:
+                    if num_units >= max_units:
+                        break
+
+                    submit(batch)
+
+                    batch = []
+                    num_units += 1
+
+                if waiting is None:
+                    if has_loaded_all or not ordered.has_room_for(num_loaded):
+                        break
+
+                    try:
+                        waiting = next(loaded)
+                    except StopIteration:
+                        has_loaded_all = True
+
+                        break
+
+                    num_loaded += 1
+
+                index, (path, checked, text, encoding) = waiting
+
+                if checked != CheckResult.FILE_CHECKED:
+                    ordered.put(index, (path, checked, None, []))
+                elif len(text) <= BATCHING_THRESHOLD:
+                    batch.append(waiting)
+                elif num_units < max_units:
+                    submit([waiting])
+
+                    num_units += 1
+                else:
+                    break
+
+                waiting = None
+
+            is_holding_back = (len(batch) > 0 and
+                               (has_loaded_all or num_units == 0 or
+                                any(index == ordered.next_index for index, item in batch)))
+
+            if is_holding_back and num_units < max_units:
+                # submit an incomplete batch rather than holding back the next result
+                submit(batch)
+
+                batch = []
+                num_units += 1
+
+            for examined in ordered.released():
+                num_released += 1
+
+                if isinstance(examined, Exception):
+                    raise examined
+
+                path, checked, encoding, violations = examined
+
+                result, checked = report_examined(path, checked, encoding, violations,
+                                                  rules, reporter)
+
+                yield path, (result, checked)
+
+                if should_stop(result, reporter, fail_fast):
+                    # cancel any pending work; remaining files would not be reported anyway
+                    return
+
+            if has_loaded_all and num_released == num_loaded:
+                break
+
+            if num_units == 0:
+                continue
+
+            # wait for at least one unit of work, but take any other completed units as well
+            while True:
+                for index, result, time_taken in completed.get():
+                    ordered.put(index, result)
+
+                    if timings is not None and time_taken is not None:
+                        path, checked, encoding, violations = result
+
+                        timings[os.path.abspath(path)] = time_taken
+
+                num_units -= 1
+
+                if completed.empty():
+                    break
+
+
+class ReorderBuffer:
+    """ Represents a buffer of results that are put in any order, but released in order.
+
+        Each result is identified by its index in a sequence. A result is released only once all
+        results preceding it have been released.
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self.pending = {}
+        self.next_index = 0
+
+    def has_room_for(self, index: int) -> bool:
+        """ Determine whether a result at an index fits within the window of pending results.
+
+            The window spans from the next result to be released; a result outside the window
+            should not be produced until earlier results have been released.
+        """
+
+        return index < self.next_index + self.window
+
+    def put(self, index: int, result):
+        """ Put a result at an index in the sequence. """
+
+        self.pending[index] = result
+
+    def released(self):
+        """ Yield each result that follows in sequence, removing it from the buffer. """
+
+        while self.next_index in self.pending:
+            result = self.pending.pop(self.next_index)
+
+            self.next_index += 1
+
+            yield result
+
+
+class TimedOut(Exception):
+    """ Raised when a task is not completed in time. """
+
+
+class SupervisedPool:
+    """ Represents a pool of worker processes, each running one task at a time under supervision
+        of a thread in the main process.
+
+        A worker that does not complete its task in time is killed and replaced. A worker is
+        also replaced once it has completed a number of tasks, or once its memory usage exceeds
+        a limit; this keeps long runs stable, even if memory is leaked along the way.
+    """
+
+    def __init__(self, processes: int, initializer, initargs: tuple, timeout: float=None,
+                 max_tasks: int=None, max_memory: int=None):
+        self.initializer = initializer
+        self.initargs = initargs
+        self.timeout = timeout
+        self.max_tasks = max_tasks
+        self.max_memory = max_memory
+
+        self.tasks = queue.Queue()
+
+        self.is_terminating = False
+
+        self.supervisors = [threading.Thread(target=self.supervise, daemon=True)
+                            for _ in range(processes)]
+
+        for supervisor in self.supervisors:
+            supervisor.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.terminate()
+
+    def apply_async(self, func, args: tuple=(), callback=None, error_callback=None):
+        """ Start a task on the first available worker.
+
+            Calls back with the result when completed, or with an exception if failed. The
+            exception is TimedOut if the task was not completed in time.
+        """
+
+        self.tasks.put((func, args, callback, error_callback))
+
+    def terminate(self):
+        """ Stop every worker immediately; any pending tasks are dropped. """
+
+        self.is_terminating = True
+
+        for _ in self.supervisors:
+            self.tasks.put(None)
+
+        for supervisor in self.supervisors:
+            supervisor.join()
+
+    def started_worker(self) -> tuple:
+        """ Start a worker process and return it along with a connection to it. """
+
+        connection, worker_connection = multiprocessing.Pipe()
+
+        worker = multiprocessing.Process(target=run_supervised_worker,
+                                         args=(worker_connection, self.initializer, self.initargs),
+                                         daemon=True)
+        worker.start()
+
+        # only the worker should hold on to its end of the connection
+        worker_connection.close()
+
+        return worker, connection
+
+    def outcome_of_task(self, connection) -> tuple:
+        """ Wait for the outcome of the task currently running on a worker.
+
+            Return None if the task was not completed in time, or if the pool is terminating.
+        """
+
+        time_started = time.monotonic()
+
+        while True:
+            interval = SUPERVISION_INTERVAL
+
+            if self.timeout is not None:
+                time_remaining = self.timeout - (time.monotonic() - time_started)
+
+                if time_remaining <= 0:
+                    return None
+
+                interval = min(interval, time_remaining)
+
+            if connection.poll(interval):
+                break
+
+            if self.is_terminating:
+                return None
+
+        try:
+            return connection.recv()
+        except (OSError, EOFError):
+            return False, RuntimeError('worker process stopped unexpectedly'), None
+
+    def supervise(self):
+        """ Run tasks on a worker process, one at a time, until terminated. """
+
+        worker = None
+        connection = None
+
+        num_tasks = 0
+
+        while True:
+            task = self.tasks.get()
+
+            if task is None or self.is_terminating:
+                break
+
+            func, args, callback, error_callback = task
+
+            if worker is None:
+                worker, connection = self.started_worker()
+
+                num_tasks = 0
+
+            try:
+                connection.send((func, args))
+
+                outcome = self.outcome_of_task(connection)
+            except (OSError, EOFError):
+                outcome = False, RuntimeError('worker process stopped unexpectedly'), None
+
+            num_tasks += 1
+
+            if outcome is None:
+                # the worker is stuck; replace it
+                worker.terminate()
+                worker.join()
+
+                worker = None
+
+                if self.is_terminating:
+                    break
+
+                error_callback(TimedOut('task was not completed within {0} seconds'
+                                        .format(self.timeout)))
+
+                continue
+
+            is_completed, result, memory_used = outcome
+
+            should_retire = (memory_used is None or
+                             (self.max_tasks is not None and num_tasks >= self.max_tasks) or
+                             (self.max_memory is not None and memory_used > self.max_memory))
+
+            if should_retire:
+                worker.terminate()
+                worker.join()
+
+                worker = None
+
+            if is_completed:
+                callback(result)
+            else:
+                error_callback(result)
+
+        if worker is not None:
+            worker.terminate()
+            worker.join()
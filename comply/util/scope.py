@@ -21,3 +21,49 @@ def depth(index: int, text: str):
             depth_count -= 1
 
     return depth_count
+
+
+def top_level_boundaries(text: str, lines_per_part: int) -> list:
+    """ Return character indices at which a text can be split into parts of at least a number
+        of lines each, without splitting any scope.
+
+        A boundary is only placed following a line that ends a statement or a scope (i.e. ending
+        with ';' or '}') at a depth of 0. Each index points to the beginning of the line that
+        follows.
+
+        Note that braces found inside comments or literals are not ignored and will be counted.
+    """
+
+    boundaries = []
+
+    depth_count = 0
+    lines_since_boundary = 0
+
+    line_starting_index = 0
+
+    while True:
+        line_ending_index = text.find('\n', line_starting_index)
+
+        if line_ending_index == -1:
+            # the last line is never followed by a boundary
+            break
+
+        line = text[line_starting_index:line_ending_index]
+
+        depth_count += line.count('{') - line.count('}')
+        lines_since_boundary += 1
+
+        line_starting_index = line_ending_index + 1
+
+        if depth_count != 0 or lines_since_boundary < lines_per_part:
+            continue
+
+        if not line.rstrip().endswith((';', '}')):
+            continue
+
+        if line_starting_index < len(text):
+            boundaries.append(line_starting_index)
+
+            lines_since_boundary = 0
+
+    return boundaries
@@ -228,3 +228,100 @@ def blanked(text: str, keepends: bool=True) -> str:
         blanked_text = ' ' * len(text)
 
     return blanked_text
+
+
+def changes_between(text: str, stripped: str) -> list:
+    """ Return the changes made to a text by stripping it, as a list of alternating offsets and
+        replacements, to be applied through with_changes().
+
+        Each offset counts the characters kept since the previous change. Each replacement is
+        either a number of characters replaced by whitespace, a collapsed function body (as
+        a list of '{}' and the length of the body), or otherwise the replacing characters.
+    """
+
+    changes = []
+
+    kept_from = 0
+
+    for match in re.finditer(r' +|\{\}', stripped):
+        starting, ending = match.span()
+
+        if starting < kept_from or stripped[starting:ending] == text[starting:ending]:
+            continue
+
+        if match.group() == '{}':
+            ending = ending_of_braces(text, starting)
+
+            replacement = ['{}', ending - starting]
+
+            if with_changes(text[starting:ending], [0, replacement]) != stripped[starting:ending]:
+                replacement = stripped[starting:ending]
+        else:
+            replacement = ending - starting
+
+        changes.append(starting - kept_from)
+        changes.append(replacement)
+
+        kept_from = ending
+
+    return changes
+
+
+def with_changes(text: str, changes: list) -> str:
+    """ Return a text with changes applied, as found by changes_between(). """
+
+    parts = []
+
+    kept_from = 0
+
+    for i in range(0, len(changes), 2):
+        starting = kept_from + changes[i]
+
+        replacement = changes[i + 1]
+
+        if isinstance(replacement, int):
+            replacement = ' ' * replacement
+        elif isinstance(replacement, list):
+            # leave behind a collapsed function body; see strip_function_bodies()
+            body = text[starting:starting + replacement[1]]
+
+            replacement = '{}' + blanked(body)[1:-1]
+
+        parts.append(text[kept_from:starting])
+        parts.append(replacement)
+
+        kept_from = starting + len(replacement)
+
+    parts.append(text[kept_from:])
+
+    return ''.join(parts)
+
+
+def restored(text: str, changes: list) -> str:
+    """ Return a text with changes applied, as found by changes_between(), or None if the changes
+        do not fit the text.
+    """
+
+    try:
+        changed = with_changes(text, changes)
+    except (TypeError, ValueError, IndexError):
+        return None
+
+    if not is_seemingly_identical(changed, original=text):
+        return None
+
+    return changed
+
+
+def ending_of_braces(text: str, starting: int) -> int:
+    """ Return the index following the brace closing the brace found at an index in a text. """
+
+    level = 0
+
+    for match in re.compile(r'[{}]').finditer(text, starting):
+        level += 1 if match.group() == '{' else -1
+
+        if level == 0:
+            return match.end()
+
+    return len(text)
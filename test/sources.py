@@ -0,0 +1,66 @@
+# coding=utf-8
+
+"""
+Helper functions for checking a small set of source files and recording what gets reported.
+
+The same sources are checked throughout the tests of scheduling, merging, distributing and
+caching; each source violates a different set of rules, so that any difference in what gets
+reported, or in which order, shows up.
+"""
+
+import os
+
+import comply.rules
+
+from comply.reporting import Reporter
+from comply.rules.rule import Rule
+from comply.scheduling import PROCESS_BACKEND, check_in_stages
+
+rules = Rule.rules_in([comply.rules.standard])
+
+
+class RecordingReporter(Reporter):
+    def __init__(self):
+        Reporter.__init__(self)
+
+        self.reported = []
+
+    def report(self, violations: list, path: str):
+        self.reported.append(
+            (os.path.basename(path), [(v.which.name, v.starting) for v in violations]))
+
+
+def make_sources(directory: str) -> list:
+    texts = [
+        'void func();\n',
+        'int func(int a, int b, int c, int d, int e) {\n\treturn 0;\n}\n',
+        '#include <stdio.h>\n#include <stdio.h>\n',
+        'void func(void);\n'
+    ]
+
+    paths = []
+
+    for i, text in enumerate(texts):
+        path = os.path.join(directory, 'source_{0}.c'.format(i))
+
+        with open(path, 'w') as file:
+            file.write(text)
+
+        paths.append(path)
+
+    return paths
+
+
+def check_all(paths: list, jobs: int, backend: str=PROCESS_BACKEND, timings: dict=None,
+              longest_first: bool=False, timeout: float=None) -> tuple:
+    reporter = RecordingReporter()
+
+    discovered = [(path, None) for path in paths]
+
+    checked = check_in_stages(discovered, rules, reporter, jobs, backend,
+                              timings, longest_first, timeout)
+
+    results = [(os.path.basename(path), code, result.num_violations, result.num_severe_violations)
+               for path, (result, code) in checked]
+
+    return results, reporter.reported
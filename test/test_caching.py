@@ -0,0 +1,207 @@
+# coding=utf-8
+
+import os
+import tempfile
+
+import comply.caching
+import comply.scheduling
+import comply.util.stripping
+
+from comply.caching import ResultCache, ARTIFACT_THRESHOLD
+from comply.checking import load, collect
+from comply.scheduling import check_in_stages
+from comply.rules.standard import TooManyParams
+
+from test.sources import RecordingReporter, make_sources, rules
+
+
+def check_cached(paths: list, cache_path: str, rules: list=rules, jobs: int=1) -> tuple:
+    """ Check files using a cache, and return the results, the reported violations and the name
+        of every file that was read and checked.
+    """
+
+    read = []
+    checked = []
+
+    def recording_load(path: str):
+        read.append(os.path.basename(path))
+
+        return load(path)
+
+    check_loaded = comply.scheduling.check_loaded
+
+    def recording_check_loaded(path: str, *args, **kwargs):
+        checked.append(os.path.basename(path))
+
+        return check_loaded(path, *args, **kwargs)
+
+    comply.scheduling.check_loaded = recording_check_loaded
+
+    reporter = RecordingReporter()
+
+    cache = ResultCache(cache_path)
+
+    try:
+        results = [(os.path.basename(path), code, result.num_violations)
+                   for path, (result, code)
+                   in check_in_stages([(path, None) for path in paths], rules, reporter, jobs,
+                                      load=recording_load, cache=cache)]
+    finally:
+        comply.scheduling.check_loaded = check_loaded
+
+    cache.save()
+
+    return results, reporter.reported, read, checked
+
+
+def test_cached_results():
+    with tempfile.TemporaryDirectory() as directory:
+        paths = make_sources(directory)
+
+        # files modified too recently are not trusted to be unchanged
+        for path in paths:
+            os.utime(path, (0, 0))
+
+        cache_path = os.path.join(directory, '.comply-cache')
+
+        results, reported, read, checked = check_cached(paths, cache_path)
+
+        assert read == checked == [os.path.basename(path) for path in paths]
+
+        # nothing has changed; nothing is read, or checked, again
+        assert check_cached(paths, cache_path) == (results, reported, [], [])
+
+        load_results = ResultCache.load
+
+        # results that can not be used after all; files are read as they were when discovered
+        ResultCache.load = lambda cache, key: None
+
+        try:
+            assert check_cached(paths, cache_path) == (results, reported, read, checked)
+        finally:
+            ResultCache.load = load_results
+
+        # the file seems changed, but its content is the same
+        os.utime(paths[1], (1, 1))
+
+        assert check_cached(paths, cache_path)[2:] == (['source_1.c'], [])
+
+        with open(paths[1], 'w') as file:
+            file.write('void func(void);\n')
+
+        os.utime(paths[1], (0, 0))
+
+        assert check_cached(paths, cache_path)[2:] == (['source_1.c'], ['source_1.c'])
+
+        # the change has been seen; nothing is read again
+        assert check_cached(paths, cache_path)[2:] == ([], [])
+
+        # results are kept by rule; any subset of the rules has nothing to check again
+        assert check_cached(paths, cache_path, rules=rules[:5])[3] == []
+
+        # the cache is never trusted if it can not be read
+        with open(cache_path, 'wb') as file:
+            file.write(b'not a cache')
+
+        assert check_cached(paths, cache_path)[3] == checked
+
+
+def test_cached_results_in_parallel():
+    with tempfile.TemporaryDirectory() as directory:
+        paths = make_sources(directory)
+
+        for path in paths:
+            os.utime(path, (0, 0))
+
+        cache_path = os.path.join(directory, '.comply-cache')
+
+        results, reported, read, checked = check_cached(paths, cache_path, jobs=2)
+
+        # results found in parallel are kept as well
+        assert check_cached(paths, cache_path) == (results, reported, [], [])
+
+
+def test_cached_results_by_rule():
+    with tempfile.TemporaryDirectory() as directory:
+        paths = make_sources(directory)
+
+        for path in paths:
+            os.utime(path, (0, 0))
+
+        cache_path = os.path.join(directory, '.comply-cache')
+
+        check_cached(paths, cache_path)
+
+        collected = []
+
+        def recording_collect(file, rules, *args, **kwargs):
+            collected.extend(rule.name for rule in rules)
+
+            return collect(file, rules, *args, **kwargs)
+
+        comply.scheduling.collect = recording_collect
+
+        TooManyParams.MAX = 5
+
+        try:
+            results, reported, read, checked = check_cached(paths, cache_path)
+
+            # a changed rule is checked again, but only that rule
+            assert read == [os.path.basename(path) for path in paths]
+            assert checked == []
+            assert set(collected) == {'too-many-params'}
+
+            # the results are the same as if every rule had checked every file
+            uncached_path = os.path.join(directory, '.comply-uncached')
+
+            assert (results, reported) == check_cached(paths, uncached_path)[:2]
+            assert check_cached(paths, cache_path) == (results, reported, [], [])
+        finally:
+            TooManyParams.MAX = 4
+
+            comply.scheduling.collect = collect
+
+
+def test_cached_artifacts():
+    with tempfile.TemporaryDirectory() as directory:
+        paths = make_sources(directory)
+
+        for path in paths:
+            os.utime(path, (0, 0))
+
+        cache_path = os.path.join(directory, '.comply-cache')
+
+        stripped = []
+
+        strip_any_literals = comply.util.stripping.strip_any_literals
+
+        def recording_strip_any_literals(text: str) -> str:
+            stripped.append(text)
+
+            return strip_any_literals(text)
+
+        # these files are too short to keep artifacts for otherwise
+        comply.caching.ARTIFACT_THRESHOLD = 0
+
+        try:
+            check_cached(paths, cache_path)
+
+            comply.util.stripping.strip_any_literals = recording_strip_any_literals
+
+            TooManyParams.MAX = 5
+
+            results, reported, read, checked = check_cached(paths, cache_path)
+
+            # the changed rule looks at stripped text, but nothing is stripped again
+            assert read == [os.path.basename(path) for path in paths]
+            assert stripped == []
+
+            uncached_path = os.path.join(directory, '.comply-uncached')
+
+            assert (results, reported) == check_cached(paths, uncached_path)[:2]
+        finally:
+            TooManyParams.MAX = 4
+
+            comply.util.stripping.strip_any_literals = strip_any_literals
+
+            comply.caching.ARTIFACT_THRESHOLD = ARTIFACT_THRESHOLD
@@ -0,0 +1,98 @@
+# coding=utf-8
+
+import os
+import codecs
+import tempfile
+
+from comply.checking import decode, load, prepare, collect, collect_batch, is_generated
+from comply.rules.report import CheckResult
+from comply.rules.standard import (
+    LineTooLong, FileTooLong, TabCharacters, InvisibleCharacters, TooManyBlanks, PadCommas
+)
+
+
+def test_decode():
+    assert decode(b'int a;\r\nint b;\rint c;\n') == ('int a;\nint b;\nint c;\n', 'utf8')
+    assert decode('/* café */'.encode('cp1252')) == ('/* café */', 'cp1252')
+
+    # any byte order mark is kept, but decides the encoding
+    assert decode(codecs.BOM_UTF8 + b'int a;') == ('\ufeffint a;', 'utf8')
+    assert decode('\ufeffint a;'.encode('utf-16-le')) == ('\ufeffint a;', 'utf-16-le')
+    assert decode('\ufeffint a;'.encode('utf-32-be')) == ('\ufeffint a;', 'utf-32-be')
+
+
+def test_load():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'source.c')
+
+        data = '/* café */\r\n'.encode('cp1252')
+
+        with open(path, 'wb') as file:
+            file.write(data)
+
+        assert load(path) == (CheckResult.FILE_CHECKED, '/* café */\n', 'cp1252', data)
+
+        assert load(os.path.join(directory, 'missing.c'))[0] == CheckResult.FILE_NOT_FOUND
+        assert load(directory + '.c')[0] == CheckResult.FILE_NOT_FOUND
+
+
+def test_lazy_stripping():
+    text = 'int a; /* b,c */\n\n\n\tchar * d = "e,f";\n'
+
+    file = prepare(text, 'source', '.c')
+
+    rules = [LineTooLong(), FileTooLong(), TabCharacters(), InvisibleCharacters(),
+             TooManyBlanks()]
+
+    assert [violation.which.name for violation in collect(file, rules)] == ['tab-characters',
+                                                                            'too-many-blanks']
+
+    # none of these rules look at stripped text; it has not been stripped
+    assert file._stripped is None
+
+    assert collect(file, [PadCommas()]) == []
+    assert file.stripped == 'int a;          \n\n\n\tchar * d = "   ";\n'
+
+
+def test_screening():
+    text = 'int a;\n' + 'a' * 70 + ';\n'
+
+    files = [prepare(text, 'source', '.c'), prepare('int b;\n', 'other', '.c')]
+
+    assert collect(files[0], [LineTooLong()]) == []
+
+    LineTooLong.MAX = 60
+
+    try:
+        # the screen follows the limit it guards, whether checking one file or a batch
+        assert len(collect(files[0], [LineTooLong()])) == 1
+        assert [len(violations) for violations in collect_batch(files, [LineTooLong()])] == [1, 0]
+    finally:
+        LineTooLong.MAX = 80
+
+    files = [prepare('int a;\n  ', 'source', '.c'), prepare('int b;\n', 'other', '.c')]
+
+    assert collect(files[0], [TooManyBlanks()]) == []
+
+    TooManyBlanks.MAX = 0
+
+    try:
+        # any blank line is too many; there is nothing to screen for
+        assert len(collect(files[0], [TooManyBlanks()])) == 1
+        assert [len(violations) for violations in collect_batch(files, [TooManyBlanks()])] == [1, 0]
+    finally:
+        TooManyBlanks.MAX = 1
+
+
+def test_generated():
+    assert is_generated('/* This file is automatically generated by Bison 3.8. */\nint a;\n')
+    assert is_generated('// @generated by cbindgen\nint a;\n')
+    assert is_generated('// Code generated by protoc-gen-c. DO NOT EDIT.\nint a;\n')
+    assert is_generated('int table[] = {' + ', '.join(['0'] * 200) + '};\n')
+
+    assert not is_generated('/* a hand-written source */\nint a;\n')
+    # headers filled in by configure are still maintained by hand
+    assert not is_generated('/* XlibConf.h.  Generated from XlibConf.h.in by configure.  */\n')
+    assert not is_generated('/* Please do not edit this without updating the docs */\nint a;\n')
+    # a banner further into the file is more likely to be about something else
+    assert not is_generated('int a;\n' * 1000 + '/* DO NOT EDIT */\n')
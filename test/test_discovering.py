@@ -0,0 +1,212 @@
+# coding=utf-8
+
+import io
+import os
+import json
+import tarfile
+import zipfile
+import tempfile
+import subprocess
+
+from comply.discovering import (
+    find_checkable_files, find_tracked_files, find_archived_files, load_excluded_patterns,
+    load_compilation_database, compiled_files_finder, read_listed_paths
+)
+
+
+def make_tree(directory: str, paths: list):
+    for path in paths:
+        path = os.path.join(directory, path)
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        with open(path, 'w') as file:
+            file.write('\n')
+
+
+def found(directory: str, excluded: list=None) -> list:
+    return [os.path.relpath(path, directory).replace(os.sep, '/')
+            for path in find_checkable_files(directory, excluded)]
+
+
+def test_sorted_discovery():
+    with tempfile.TemporaryDirectory() as directory:
+        make_tree(directory, ['b.c', 'a/b.h', 'a-b/c.c', 'a.c', 'a/c/d.C', 'e.txt', '.git/f.c',
+                              'dir.c/g.c', '.hidden.c'])
+
+        assert found(directory) == ['a-b/c.c', 'a.c', 'a/b.h', 'b.c', 'dir.c/g.c']
+
+
+def test_excluded_discovery():
+    with tempfile.TemporaryDirectory() as directory:
+        make_tree(directory, ['src/a.c', 'src/build/b.c', 'build/c.c', 'third_party/d.h',
+                              'src/e_generated.c', 'src/build.c'])
+
+        assert found(directory, ['build/', 'third_party', '*_generated.c']) == ['src/a.c',
+                                                                                'src/build.c']
+
+        assert found(directory, [os.path.join(directory, 'src', '*').replace(os.sep, '/')]) == [
+            'build/c.c', 'third_party/d.h']
+
+    # hidden files are excluded by name; the input itself can be anywhere
+    with tempfile.TemporaryDirectory(prefix='.') as directory:
+        make_tree(directory, ['a.c', 'src/.b.c'])
+
+        assert found(directory) == ['a.c']
+
+
+def test_relative_discovery():
+    with tempfile.TemporaryDirectory() as directory:
+        make_tree(directory, ['tree/a.c', 'tree/.b.c', 'tree/src/c.c', 'tree/src/.d/e.c'])
+
+        working_directory = os.getcwd()
+
+        os.chdir(os.path.join(directory, 'tree', 'src'))
+
+        try:
+            # relative inputs are not hidden, even though they start with a dot
+            assert list(find_checkable_files('..')) == [os.path.join('..', 'a.c'),
+                                                        os.path.join('..', 'src', 'c.c')]
+            assert list(find_checkable_files(os.path.join('..', 'src'))) == [
+                os.path.join('..', 'src', 'c.c')]
+            assert list(find_checkable_files('.')) == [os.path.join('.', 'c.c')]
+        finally:
+            os.chdir(working_directory)
+
+
+def test_excluded_patterns():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, '.complyignore')
+
+        with open(path, 'w') as file:
+            file.write('# vendored code\nthird_party/\n\n  build  \n')
+
+        assert load_excluded_patterns(path) == ['third_party/', 'build']
+        assert load_excluded_patterns(os.path.join(directory, 'missing')) == []
+
+
+def test_symbolic_links():
+    with tempfile.TemporaryDirectory() as directory:
+        make_tree(directory, ['src/a.c', 'src/sub/b.c'])
+
+        try:
+            # a loop, and a file reachable through more than one path
+            os.symlink(os.path.join(directory, 'src'), os.path.join(directory, 'src', 'sub', 'loop'))
+            os.symlink(os.path.join(directory, 'src', 'a.c'), os.path.join(directory, 'z.c'))
+        except (OSError, NotImplementedError):
+            # symbolic links are not supported on this system
+            return
+
+        assert found(directory) == ['src/a.c', 'src/sub/b.c']
+
+
+def test_tracked_discovery():
+    with tempfile.TemporaryDirectory() as directory:
+        make_tree(directory, ['src/a.c', 'src/b.h', 'src/deleted.c', 'build/c.c', 'd.c', 'e.C'])
+
+        try:
+            subprocess.run(['git', 'init', '-q', directory], check=True)
+            subprocess.run(['git', '-C', directory, 'add', 'src', 'd.c', 'e.C'], check=True)
+        except (OSError, subprocess.CalledProcessError):
+            # git is not available
+            return
+
+        os.remove(os.path.join(directory, 'src', 'deleted.c'))
+
+        make_tree(directory, ['src/untracked.c'])
+
+        found_tracked = [os.path.relpath(path, directory).replace(os.sep, '/')
+                         for path in find_tracked_files(directory, ['b.h'])]
+
+        assert found_tracked == ['d.c', 'src/a.c']
+
+    with tempfile.TemporaryDirectory() as directory:
+        make_tree(directory, ['a.c'])
+
+        # not a repository; files are found on disk instead
+        assert list(find_tracked_files(directory)) == list(find_checkable_files(directory))
+
+
+def test_compilation_database():
+    with tempfile.TemporaryDirectory() as directory:
+        make_tree(directory, ['src/a.c', 'src/b.c', 'src/b.h', 'src/dead.c', 'include/c.h'])
+
+        database_path = os.path.join(directory, 'compile_commands.json')
+
+        with open(database_path, 'w') as file:
+            json.dump([{'directory': os.path.join(directory, 'src'), 'file': 'b.c'},
+                       {'directory': directory, 'file': 'src/a.c', 'command': 'cc -c src/a.c'},
+                       {'directory': directory, 'file': 'src/a.c', 'command': 'cc -DA src/a.c'},
+                       {'directory': directory, 'file': 'src/d.cpp'}], file)
+
+        translation_units = load_compilation_database(database_path)
+
+        assert translation_units == [os.path.join(directory, 'src', 'a.c'),
+                                     os.path.join(directory, 'src', 'b.c'),
+                                     os.path.join(directory, 'src', 'd.cpp')]
+
+        find_files = compiled_files_finder(database_path, translation_units, find_checkable_files)
+
+        assert [os.path.relpath(path, directory).replace(os.sep, '/')
+                for path in find_files(database_path, ['b.*'])] == ['src/a.c']
+
+        assert [os.path.relpath(path, directory).replace(os.sep, '/')
+                for path in find_files(directory)] == ['include/c.h', 'src/b.h']
+
+        with open(database_path, 'w') as file:
+            file.write('[{"file": "a.c"}]')
+
+        try:
+            load_compilation_database(database_path)
+
+            assert False
+        except ValueError:
+            pass
+
+
+def test_listed_paths():
+    listed = b'a.c\nsrc/b.h\r\n\n  c.c\n'
+
+    assert list(read_listed_paths(io.BytesIO(listed))) == ['a.c', 'src/b.h', '  c.c']
+
+    # names may contain linebreaks when delimited by NUL characters
+    listed = b'a.c\x00src/b\n.h\x00c.c'
+
+    assert list(read_listed_paths(io.BytesIO(listed))) == ['a.c', 'src/b\n.h', 'c.c']
+    assert list(read_listed_paths(io.BytesIO(b''))) == []
+
+
+def test_archived_discovery():
+    with tempfile.TemporaryDirectory() as directory:
+        source_directory = os.path.join(directory, 'src')
+
+        make_tree(source_directory, ['b.c', 'a/b.h', 'e.txt', '.git/f.c', 'build/g.c'])
+
+        tar_path = os.path.join(directory, 'src.tar.gz')
+        zip_path = os.path.join(directory, 'src.zip')
+
+        with tarfile.open(tar_path, 'w:gz') as archive:
+            archive.add(source_directory, arcname='.')
+
+        with zipfile.ZipFile(zip_path, 'w') as archive:
+            for name in ['b.c', 'a/b.h', 'e.txt', '.git/f.c', 'build/g.c']:
+                archive.write(os.path.join(source_directory, name), arcname='src/' + name)
+
+        archived = sorted(find_archived_files(tar_path, excluded=['build/']))
+
+        assert archived == [(tar_path + '!/a/b.h', b'\n'), (tar_path + '!/b.c', b'\n')]
+
+        archived = [path for path, data in find_archived_files(zip_path)]
+
+        assert archived == [zip_path + '!/src/b.c', zip_path + '!/src/a/b.h',
+                            zip_path + '!/src/build/g.c']
+
+        with open(os.path.join(directory, 'broken.zip'), 'wb') as file:
+            file.write(b'not an archive')
+
+        try:
+            list(find_archived_files(os.path.join(directory, 'broken.zip')))
+
+            assert False
+        except ValueError:
+            pass
@@ -0,0 +1,147 @@
+# coding=utf-8
+
+import os
+import sys
+import time
+import socket
+import tempfile
+import threading
+import subprocess
+
+import comply.distributing
+import comply.scheduling
+
+from comply.distributing import Coordinator, Abandoned, parse_address, receive
+from comply.scheduling import CHECKING_AHEAD, check_in_stages
+
+from test.sources import RecordingReporter, make_sources, check_all, rules
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_parse_address():
+    assert parse_address('127.0.0.1:8415') == ('127.0.0.1', 8415)
+    assert parse_address('::1:8415') == ('::1', 8415)
+
+    for address in ['8415', ':8415', 'localhost:port']:
+        try:
+            parse_address(address)
+
+            assert False
+        except ValueError:
+            pass
+
+
+def test_distributed_checks():
+    with tempfile.TemporaryDirectory() as directory:
+        paths = make_sources(directory)
+
+        results, reported = check_all(paths, jobs=1)
+
+        with Coordinator(('127.0.0.1', 0), [rule.name for rule in rules], False) as coordinator:
+            host, port = coordinator.address
+
+            # a worker that disconnects after taking on a task; another worker must take it on
+            connection = socket.create_connection((host, port))
+            stream = connection.makefile('rw', encoding='utf-8', newline='\n')
+
+            assert receive(stream)['rules'] == [rule.name for rule in rules]
+
+            abandoned = []
+
+            def abandon():
+                abandoned.append(receive(stream))
+
+                stream.close()
+                connection.close()
+
+            abandoning = threading.Thread(target=abandon)
+            abandoning.start()
+
+            workers = [subprocess.Popen([sys.executable, '-m', 'comply', 'worker',
+                                         '{0}:{1}'.format(host, port)], cwd=root)
+                       for _ in range(2)]
+
+            reporter = RecordingReporter()
+
+            checked = check_in_stages([(path, None) for path in paths], rules, reporter,
+                                      jobs=2, coordinator=coordinator)
+
+            distributed_results = [
+                (os.path.basename(path), code, result.num_violations, result.num_severe_violations)
+                for path, (result, code) in checked]
+
+            abandoning.join()
+
+        assert abandoned[0]['task'] in ['examine', 'examine_batch']
+        assert (distributed_results, reporter.reported) == (results, reported)
+
+        for worker in workers:
+            assert worker.wait(timeout=30) == 0
+
+
+def test_abandoned_checks():
+    with tempfile.TemporaryDirectory() as directory:
+        paths = []
+
+        for i in range(20):
+            path = os.path.join(directory, 'source_{0}.c'.format(i))
+
+            with open(path, 'w') as file:
+                file.write('void func_{0}(void);\n'.format(i))
+
+            paths.append(path)
+
+        abandoned_timeout = comply.distributing.ABANDONED_TIMEOUT
+        batching_threshold = comply.scheduling.BATCHING_THRESHOLD
+
+        comply.distributing.ABANDONED_TIMEOUT = 0.1
+        # every file is a unit of work of its own
+        comply.scheduling.BATCHING_THRESHOLD = 0
+
+        try:
+            with Coordinator(('127.0.0.1', 0), [rule.name for rule in rules],
+                             False) as coordinator:
+                connection = socket.create_connection(coordinator.address)
+                stream = connection.makefile('rw', encoding='utf-8', newline='\n')
+
+                receive(stream)
+
+                failures = []
+
+                def check():
+                    try:
+                        list(check_in_stages([(path, None) for path in paths], rules,
+                                             RecordingReporter(), jobs=8,
+                                             coordinator=coordinator))
+                    except Exception as failure:
+                        failures.append(failure)
+
+                checking = threading.Thread(target=check, daemon=True)
+                checking.start()
+
+                assert receive(stream)['task'] == 'examine'
+
+                time_started = time.monotonic()
+
+                while (coordinator.tasks.qsize() < CHECKING_AHEAD - 1 and
+                       time.monotonic() - time_started < 10):
+                    time.sleep(0.1)
+
+                # nothing more is handed out while the worker is busy
+                time.sleep(0.5)
+
+                # work is handed out ahead by the number of workers connected, not by jobs
+                assert coordinator.tasks.qsize() == CHECKING_AHEAD - 1
+
+                # the only worker leaves; the run must fail, rather than wait forever
+                stream.close()
+                connection.close()
+
+                checking.join(timeout=30)
+
+                assert not checking.is_alive()
+                assert len(failures) == 1 and isinstance(failures[0], Abandoned)
+        finally:
+            comply.distributing.ABANDONED_TIMEOUT = abandoned_timeout
+            comply.scheduling.BATCHING_THRESHOLD = batching_threshold
@@ -0,0 +1,160 @@
+# coding=utf-8
+
+import os
+import sys
+import time
+import tarfile
+import tempfile
+import subprocess
+
+from comply import EXIT_CODE_FAILURE
+from comply.__main__ import make_report, make_text_report
+from comply.caching import CACHE_FILENAME
+from comply.discovering import find_checkable_files
+
+from test.sources import RecordingReporter, make_sources, rules
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_text_report():
+    with tempfile.TemporaryDirectory() as directory:
+        paths = make_sources(directory)
+
+        for path in paths:
+            reporter = RecordingReporter()
+
+            result = make_report([path], rules, reporter)
+
+            with open(path, 'rb') as file:
+                text = file.read()
+
+            for data in [text, text.replace(b'\n', b'\r\n')]:
+                text_reporter = RecordingReporter()
+
+                text_result = make_text_report(data, path, rules, text_reporter)
+
+                assert text_reporter.reported == reporter.reported
+                assert text_result.num_violations == result.num_violations
+
+        not_supported_result = make_text_report(b'', 'source.txt', rules, RecordingReporter())
+
+        assert not_supported_result.num_files == 0
+
+
+def test_verbose_report():
+    class ProgressReporter(RecordingReporter):
+        def __init__(self):
+            RecordingReporter.__init__(self)
+
+            self.is_verbose = True
+            self.progress = []
+
+        def report_before_checking(self, path: str, encoding: str=None, show_progress: bool=True):
+            self.progress.append((self.files_encountered, self.files_total))
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = make_sources(directory)
+
+        def find_slowly(path: str, excluded: list):
+            # files are found slower than they are checked
+            for found_path in find_checkable_files(path, excluded):
+                time.sleep(0.05)
+
+                yield found_path
+
+        reporter = ProgressReporter()
+
+        make_report([directory], rules, reporter, find_files=find_slowly)
+
+        # the progress of each file is shown against the total, no matter how fast files are found
+        assert reporter.progress == [(1, 4), (2, 4), (3, 4), (4, 4)]
+
+
+def test_generated_report():
+    with tempfile.TemporaryDirectory() as directory:
+        paths = make_sources(directory)
+
+        with open(paths[1], 'w') as file:
+            file.write('/* DO NOT EDIT */\nint func(int a, int b, int c, int d, int e);\n')
+
+        # generated files are checked like any other, unless asked to leave them out
+        assert make_report([directory], rules, RecordingReporter()).num_files == 4
+
+        reporter = RecordingReporter()
+
+        result = make_report([directory], rules, reporter, skip_generated=True)
+
+        assert [name for name, violations in reporter.reported] == ['source_0.c', 'source_2.c',
+                                                                    'source_3.c']
+
+        # files left out are counted on their own, not toward the total
+        assert result.num_files == reporter.files_total == 3
+        assert result.num_files_generated == 1
+
+        reporter = RecordingReporter()
+
+        result = make_report([directory], rules, reporter,
+                             max_file_size=os.path.getsize(paths[2]) - 1)
+
+        assert [name for name, violations in reporter.reported] == ['source_0.c', 'source_3.c']
+
+        assert result.num_files == reporter.files_total == 2
+        assert result.num_files_generated == 2
+
+
+def test_archived_report():
+    with tempfile.TemporaryDirectory() as directory:
+        paths = make_sources(directory)
+
+        archive_path = os.path.join(directory, 'sources.tar')
+
+        with tarfile.open(archive_path, 'w') as archive:
+            for path in paths + paths[:2]:
+                # files stored more than once are read, and reported, once for each time
+                archive.add(path, arcname=os.path.basename(path))
+
+        reporter = RecordingReporter()
+
+        result = make_report([archive_path], rules, reporter)
+
+        assert result.num_files == 6
+        assert [name for name, violations in reporter.reported] == [
+            'source_0.c', 'source_1.c', 'source_2.c', 'source_3.c', 'source_0.c', 'source_1.c']
+
+
+def test_parallel_report():
+    with tempfile.TemporaryDirectory() as directory:
+        make_sources(directory)
+
+        environment = dict(os.environ, PYTHONPATH=root, PYTHONIOENCODING='UTF-8')
+
+        def checking(*options) -> subprocess.CompletedProcess:
+            return subprocess.run([sys.executable, '-m', 'comply', directory] + list(options),
+                                  cwd=directory, env=environment,
+                                  stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+        checked = checking('--jobs=1')
+        checked_in_parallel = checking('--jobs=3', '--backend=process')
+
+        # files checked in parallel are reported exactly as if checked one at a time
+        assert checked.stdout.count(b'source_') > 0
+        assert checked_in_parallel.stdout == checked.stdout
+        assert checked_in_parallel.returncode == checked.returncode != 0
+
+
+def test_conflicting_options():
+    with tempfile.TemporaryDirectory() as directory:
+        make_sources(directory)
+
+        environment = dict(os.environ, PYTHONPATH=root, PYTHONIOENCODING='UTF-8')
+
+        # results can not be cached for files checked out of order; nothing is checked
+        checking = subprocess.run([sys.executable, '-m', 'comply', directory,
+                                   '--cache', '--longest-first'],
+                                  cwd=directory, env=environment,
+                                  stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+        assert checking.returncode == EXIT_CODE_FAILURE
+        assert checking.stdout == b''
+        assert not os.path.exists(os.path.join(directory, CACHE_FILENAME))
@@ -0,0 +1,52 @@
+# coding=utf-8
+
+import os
+import tempfile
+
+from comply.__main__ import make_report, make_merged_report
+from comply.merging import shard_of, save_results
+
+from test.sources import RecordingReporter, make_sources, rules
+
+
+def test_shard_of():
+    paths = ['source_{0}.c'.format(i) for i in range(100)]
+
+    shards = [shard_of(path, 4) for path in paths]
+
+    assert set(shards) == {1, 2, 3, 4}
+    assert shards == [shard_of(path, 4) for path in paths]
+    assert shard_of('src/source.c', 4) == shard_of(os.path.join('src', 'source.c'), 4)
+
+
+def test_merged_report():
+    with tempfile.TemporaryDirectory() as directory:
+        make_sources(directory)
+
+        reporter = RecordingReporter()
+
+        result = make_report([directory], rules, reporter)
+
+        results_paths = []
+
+        for shard in [(1, 2), (2, 2)]:
+            saved = []
+
+            make_report([directory], rules, RecordingReporter(), shard=shard, saved=saved)
+
+            results_path = os.path.join(directory, 'shard_{0}.json'.format(shard[0]))
+
+            save_results(results_path, shard, rules, saved)
+
+            results_paths.append(results_path)
+
+        merged_reporter = RecordingReporter()
+
+        merged_result, merged_rules = make_merged_report(results_paths, merged_reporter)
+
+        assert [rule.name for rule in merged_rules] == [rule.name for rule in rules]
+        assert merged_reporter.reported == reporter.reported
+
+        assert merged_result.num_files == result.num_files
+        assert merged_result.num_violations == result.num_violations
+        assert merged_result.num_severe_violations == result.num_severe_violations
@@ -0,0 +1,352 @@
+# coding=utf-8
+
+import os
+import time
+import queue
+import threading
+import tempfile
+import itertools
+
+from concurrent.futures import ThreadPoolExecutor
+
+import comply.scheduling
+import comply.util.stripping
+
+from comply.checking import prepare, collect, collect_batch
+from comply.rules.report import CheckResult
+from comply.scheduling import (
+    ReorderBuffer, SupervisedPool, TimedOut, PROCESS_BACKEND, THREAD_BACKEND,
+    buffered, check_in_stages, estimated_costs, submitted_ahead
+)
+
+from test.sources import RecordingReporter, make_sources, check_all, rules
+
+
+def test_thread_backend():
+    with tempfile.TemporaryDirectory() as directory:
+        paths = make_sources(directory)
+
+        results, reported = check_all(paths, jobs=1)
+
+        assert len(reported) == len(paths)
+        assert (results, reported) == check_all(paths, jobs=3, backend=THREAD_BACKEND)
+
+
+def test_chunked_checks():
+    function = ('int func_{0}(int a, int b, int c, int d, int e) {{\n'
+                '    if(a) return b;\n'
+                '\n'
+                '\n'
+                '    return 0;\n'
+                '}}\n')
+
+    text = '#include <stdio.h>\n' + ''.join([function.format(i) for i in range(20)])
+
+    threshold = comply.scheduling.CHUNKING_THRESHOLD
+    lines_per_chunk = comply.scheduling.LINES_PER_CHUNK
+    batching_threshold = comply.scheduling.BATCHING_THRESHOLD
+
+    comply.scheduling.CHUNKING_THRESHOLD = 10
+    comply.scheduling.LINES_PER_CHUNK = 5
+    # the large file is not large enough to keep from being batched otherwise
+    comply.scheduling.BATCHING_THRESHOLD = 0
+
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'large.c')
+
+            with open(path, 'w') as file:
+                file.write(text)
+
+            paths = make_sources(directory) + [path]
+
+            results, reported = check_all(paths, jobs=1)
+
+            assert (results, reported) == check_all(paths, jobs=2, backend=THREAD_BACKEND)
+
+            stripping_process_ids = []
+
+            strip_any_literals = comply.util.stripping.strip_any_literals
+
+            def recorded_strip_any_literals(text: str) -> str:
+                stripping_process_ids.append(os.getpid())
+
+                return strip_any_literals(text)
+
+            comply.util.stripping.strip_any_literals = recorded_strip_any_literals
+
+            try:
+                assert (results, reported) == check_all(paths, jobs=2, backend=PROCESS_BACKEND)
+            finally:
+                comply.util.stripping.strip_any_literals = strip_any_literals
+
+            # a large file is stripped by a worker before being split, not by this process
+            assert os.getpid() not in stripping_process_ids
+    finally:
+        comply.scheduling.CHUNKING_THRESHOLD = threshold
+        comply.scheduling.LINES_PER_CHUNK = lines_per_chunk
+        comply.scheduling.BATCHING_THRESHOLD = batching_threshold
+
+
+def test_batched_checks():
+    texts = [
+        'source with a\ttab\n',
+        ('this line is waaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaay '
+         'too long\r\n'),
+        'source with some blank lines\n\n\nmore source',
+        'source with some blank lines\r\n\r\n',
+        'source with some blank lines\u2028 \x0b',
+        '\r ',
+        '',
+        'void func();\n'
+    ]
+
+    def represented(violations: list) -> list:
+        return [(v.which.name, v.starting, v.lines, v.meta) for v in violations]
+
+    files = [prepare(text, 'source', '.c') for text in texts]
+
+    expected = [represented(collect(file, rules)) for file in files]
+
+    assert any(len(violations) > 0 for violations in expected)
+    assert [represented(violations) for violations in collect_batch(files, rules)] == expected
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = make_sources(directory) * 10
+
+        results, reported = check_all(paths, jobs=1)
+
+        assert (results, reported) == check_all(paths, jobs=2, backend=THREAD_BACKEND)
+
+
+def test_longest_first():
+    with tempfile.TemporaryDirectory() as directory:
+        paths = make_sources(directory)
+
+        timings = {}
+
+        results, reported = check_all(paths, jobs=1, timings=timings)
+
+        assert sorted(timings.keys()) == sorted([os.path.abspath(path) for path in paths])
+
+        # recorded files took two seconds per byte; remaining files are estimated by the same rate
+        sizes = [os.path.getsize(path) for path in paths]
+
+        timings = {os.path.abspath(paths[0]): sizes[0] * 2,
+                   os.path.abspath(paths[1]): sizes[1] * 2}
+
+        assert estimated_costs(paths, timings) == [size * 2 for size in sizes]
+
+        assert (results, reported) == check_all(paths, jobs=2, backend=THREAD_BACKEND,
+                                                timings=timings, longest_first=True)
+
+
+def test_file_timeout():
+    with tempfile.TemporaryDirectory() as directory:
+        paths = make_sources(directory)
+
+        assert check_all(paths, jobs=1) == check_all(paths, jobs=1, timeout=60)
+
+        results, reported = check_all(paths, jobs=2, timeout=0)
+
+        assert reported == []
+        assert [code for path, code, _, _ in results] == [CheckResult.FILE_TIMED_OUT] * len(paths)
+
+
+def test_distinct_checks():
+    with tempfile.TemporaryDirectory() as directory:
+        paths = []
+
+        for name in ['a', 'b']:
+            os.makedirs(os.path.join(directory, name))
+
+            paths.extend(make_sources(os.path.join(directory, name)))
+
+        # same content, different name; rules may look at the name
+        os.rename(paths[-1], os.path.join(directory, 'b', 'source_0.h'))
+
+        paths[-1] = os.path.join(directory, 'b', 'source_0.h')
+
+        checked_paths = []
+
+        check_loaded = comply.scheduling.check_loaded
+
+        def recording_check_loaded(path: str, *args, **kwargs):
+            checked_paths.append(os.path.relpath(path, directory).replace(os.sep, '/'))
+
+            return check_loaded(path, *args, **kwargs)
+
+        comply.scheduling.check_loaded = recording_check_loaded
+
+        try:
+            results, reported = check_all(paths, jobs=1)
+        finally:
+            comply.scheduling.check_loaded = check_loaded
+
+        assert checked_paths == ['a/source_0.c', 'a/source_1.c', 'a/source_2.c', 'a/source_3.c',
+                                 'b/source_0.h']
+
+        # copies are reported exactly as if they had been checked themselves
+        assert results[4:7] == results[0:3]
+        assert reported[4:7] == reported[0:3]
+
+        assert (results, reported) == check_all(paths, jobs=2, backend=THREAD_BACKEND)
+        assert (results, reported) == check_all(paths, jobs=2, longest_first=True)
+
+
+def test_reporting_limit():
+    with tempfile.TemporaryDirectory() as directory:
+        path = make_sources(directory)[1]
+
+        num_paths = 1000
+
+        for jobs, backend in [(1, PROCESS_BACKEND), (2, THREAD_BACKEND)]:
+            num_discovered = [0]
+
+            def discover():
+                for _ in range(num_paths):
+                    num_discovered[0] += 1
+
+                    yield path, None
+
+            reporter = RecordingReporter()
+            reporter.limit = 1
+
+            checked = list(check_in_stages(discover(), rules, reporter, jobs, backend))
+
+            assert len(reporter.reported) == 1
+            assert len(reporter.reported[0][1]) == 1
+            assert len(checked) == 1
+
+            # discovery stops shortly after the limit has been reached
+            time.sleep(0.1)
+
+            assert num_discovered[0] < num_paths
+
+
+def test_fail_fast():
+    with tempfile.TemporaryDirectory() as directory:
+        paths = make_sources(directory)
+
+        # only the second source has severe violations
+        discovered = [(path, None) for path in [paths[0], paths[1]] + [paths[3]] * 100]
+
+        for jobs, backend in [(1, PROCESS_BACKEND), (2, THREAD_BACKEND)]:
+            checked = list(check_in_stages(discovered, rules, RecordingReporter(), jobs, backend,
+                                           fail_fast=True))
+
+            assert [os.path.basename(path) for path, _ in checked] == ['source_0.c', 'source_1.c']
+            assert checked[-1][1][0].num_severe_violations > 0
+
+
+def test_buffered():
+    assert list(buffered(iter(range(10)), size=2)) == list(range(10))
+
+    closed = threading.Event()
+
+    def items():
+        try:
+            for item in range(10):
+                yield item
+        finally:
+            closed.set()
+
+    discarded = []
+
+    results = buffered(items(), size=2, discard=discarded.append)
+
+    assert next(results) == 0
+
+    results.close()
+
+    assert closed.wait(timeout=5)
+
+    # items produced, but never consumed, are discarded rather than lost
+    assert all(item > 0 for item in discarded)
+    assert discarded == sorted(discarded)
+
+
+def test_submitted_ahead():
+    consumed = threading.Event()
+
+    def items():
+        yield 1
+
+        # the first result must be available before any following item is
+        if not consumed.wait(timeout=5):
+            raise TimeoutError('first result was held back')
+
+        yield 2
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        results = submitted_ahead(items(), lambda item: executor.submit(lambda: item * 10),
+                                  ahead=4)
+
+        assert next(results) == 10
+
+        consumed.set()
+
+        assert list(results) == [20]
+
+
+def test_supervised_pool():
+    outcomes = queue.Queue()
+
+    with SupervisedPool(processes=1, initializer=int, initargs=(), timeout=1,
+                        max_tasks=1) as pool:
+        pool.apply_async(time.sleep, (60,), outcomes.put, outcomes.put)
+
+        assert isinstance(outcomes.get(timeout=30), TimedOut)
+
+        # a worker is replaced after each task
+        for _ in range(2):
+            pool.apply_async(os.getpid, (), outcomes.put, outcomes.put)
+
+        process_ids = [outcomes.get(timeout=30) for _ in range(2)]
+
+        assert process_ids[0] != process_ids[1]
+        assert os.getpid() not in process_ids
+
+
+def test_reorder_buffer():
+    ordered = ReorderBuffer(window=3)
+
+    assert ordered.has_room_for(2)
+    assert not ordered.has_room_for(3)
+
+    ordered.put(2, 'c')
+    ordered.put(1, 'b')
+
+    assert list(ordered.released()) == []
+
+    ordered.put(0, 'a')
+
+    assert list(ordered.released()) == ['a', 'b', 'c']
+
+    assert ordered.has_room_for(5)
+    assert not ordered.has_room_for(6)
+
+    ordered.put(4, 'e')
+
+    assert list(ordered.released()) == []
+
+    ordered.put(3, 'd')
+
+    assert list(ordered.released()) == ['d', 'e']
+
+
+def test_reorder_buffer_out_of_order():
+    for order in itertools.permutations(range(4)):
+        ordered = ReorderBuffer(window=4)
+
+        released = []
+
+        for index in order:
+            ordered.put(index, index)
+
+            released.extend(ordered.released())
+
+            # nothing is released ahead of any earlier result
+            assert released == list(range(len(released)))
+
+        assert released == [0, 1, 2, 3]
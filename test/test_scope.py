@@ -1,6 +1,6 @@
 # coding=utf-8
 
-from comply.util.scope import depth
+from comply.util.scope import depth, top_level_boundaries
 
 
 def test_scope_depth():
@@ -11,3 +11,20 @@ def test_scope_depth():
     assert depth(text.index('[2]'), text) == 2
     assert depth(text.index('[3]'), text) == 1
     assert depth(text.index('[4]'), text) == 1
+
+
+def test_top_level_boundaries():
+    text = ('int a;\n'
+            'void f(void) {\n'
+            '    g();\n'
+            '}\n'
+            'int b =\n'
+            '    1;\n'
+            'int c;')
+
+    assert top_level_boundaries(text, lines_per_part=1) == [text.index('void'),
+                                                             text.index('int b'),
+                                                             text.index('int c')]
+
+    assert top_level_boundaries(text, lines_per_part=3) == [text.index('int b')]
+    assert top_level_boundaries(text, lines_per_part=10) == []
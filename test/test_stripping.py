@@ -6,7 +6,12 @@ from comply.util.stripping import (
     strip_single_line_literals,
     strip_single_character_literals,
     strip_line_comments,
-    strip_block_comments
+    strip_block_comments,
+    strip_any_literals,
+    strip_any_comments,
+    strip_function_bodies,
+    changes_between,
+    with_changes
 )
 
 
@@ -84,3 +89,23 @@ def test_strip_block_comments():
                                           '             \n'
                                           '   \n'
                                           'char a;')
+
+
+def test_changes():
+    text = ('int a; /* b,c */\n'
+            'int f(void) {\n'
+            '\treturn "x";\n'
+            '}\n')
+
+    stripped = strip_any_comments(strip_any_literals(text))
+    collapsed = strip_function_bodies(stripped)
+
+    # whitespace that was already there may be counted as changed, but is never left out
+    assert changes_between(text, stripped) == [6, 10, 24, 1]
+    # a collapsed function body is only marked, not copied
+    assert changes_between(stripped, collapsed) == [29, ['{}', 16]]
+
+    assert with_changes(text, changes_between(text, stripped)) == stripped
+    assert with_changes(stripped, changes_between(stripped, collapsed)) == collapsed
+
+    assert changes_between(text, text) == []